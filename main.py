@@ -18,7 +18,7 @@ from datetime import datetime
 import json
 import traceback
 import logging
-from orchestrator.cim_orchestrator import CIMOrchestrator
+from orchestrator.cim_orchestrator import CIMOrchestrator, load_chunk_text
 from orchestrator.supabase import supabase
 from orchestrator.tools import TOOL_REGISTRY
 from typing import Optional
@@ -453,6 +453,10 @@ def generate_memo():
 def get_document_chunks(deal_id):
     """
     Get document chunks for a deal with optional filtering.
+    
+    Large chunks are stored gzipped in object storage with a null
+    chunk_text; their text is fetched back here so every row returned has
+    chunk_text set. The search filter only matches text stored in the row.
     """
     try:
         section_type = request.args.get('section_type')
@@ -469,6 +473,9 @@ def get_document_chunks(deal_id):
             query = query.ilike("chunk_text", f"%{search}%")
             
         result = query.execute()
+        for chunk in result.data:
+            if chunk.get("chunk_text") is None and chunk.get("chunk_storage_uri"):
+                chunk["chunk_text"] = load_chunk_text(chunk)
         return jsonify(result.data)
         
     except Exception as e:
@@ -0,0 +1,42 @@
+"""add chunk storage uri
+
+Revision ID: 20240322000000
+Revises: 20240321000000
+Create Date: 2024-03-22 00:00:00.000000
+
+"""
+import gzip
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20240322000000'
+down_revision = '20240321000000'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Large chunk bodies are moved to object storage and referenced by path
+    op.add_column('document_chunks', sa.Column('chunk_storage_uri', sa.Text, nullable=True))
+    op.alter_column('document_chunks', 'chunk_text', existing_type=sa.Text, nullable=True)
+
+def downgrade():
+    # chunk_text becomes NOT NULL again, so copy offloaded text back from the
+    # document-chunks bucket first. This needs SUPABASE_URL and
+    # SUPABASE_SERVICE_ROLE_KEY; the stored objects are left in place.
+    connection = op.get_bind()
+    offloaded = connection.execute(sa.text(
+        "SELECT id, chunk_storage_uri FROM document_chunks "
+        "WHERE chunk_text IS NULL AND chunk_storage_uri IS NOT NULL"
+    )).fetchall()
+    if offloaded:
+        from orchestrator.supabase import supabase
+        bucket = supabase.storage.from_('document-chunks')
+        for chunk_id, storage_uri in offloaded:
+            chunk_text = gzip.decompress(bucket.download(storage_uri)).decode('utf-8')
+            connection.execute(
+                sa.text("UPDATE document_chunks SET chunk_text = :chunk_text WHERE id = :id"),
+                {"chunk_text": chunk_text, "id": chunk_id}
+            )
+    op.alter_column('document_chunks', 'chunk_text', existing_type=sa.Text, nullable=False)
+    op.drop_column('document_chunks', 'chunk_storage_uri')
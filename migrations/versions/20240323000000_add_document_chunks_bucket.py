@@ -0,0 +1,32 @@
+"""add document chunks bucket
+
+Revision ID: 20240323000000
+Revises: 20240322000000
+Create Date: 2024-03-23 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20240323000000'
+down_revision = '20240322000000'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Private bucket holding gzipped text of offloaded document_chunks rows.
+    # Supabase keeps buckets in storage.buckets; skip databases without it.
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('storage.buckets') IS NOT NULL THEN
+                INSERT INTO storage.buckets (id, name, public)
+                VALUES ('document-chunks', 'document-chunks', false)
+                ON CONFLICT (id) DO NOTHING;
+            END IF;
+        END $$;
+    """)
+
+def downgrade():
+    # The bucket is kept: it may hold the only copy of offloaded chunk text
+    pass
@@ -3,8 +3,7 @@
 
 from orchestrator.base_agent import BaseAgent
 from orchestrator.tools import Tool, TOOL_REGISTRY
-import re
-import json
+import openai
 from typing import Optional, Dict, List
 
 class ChartAgent(BaseAgent):
@@ -18,7 +17,8 @@ class ChartAgent(BaseAgent):
         agent_name: str = "chart_agent",
         user_id: Optional[str] = None,
         deal_id: Optional[str] = None,
-        toolbox: Dict[str, Tool] = None
+        toolbox: Dict[str, Tool] = None,
+        llm_client: Optional[openai.OpenAI] = None
     ):
         """
         Initialize the chart agent.
@@ -28,12 +28,14 @@ class ChartAgent(BaseAgent):
             user_id: Optional user ID for model configuration
             deal_id: Optional deal ID for model configuration
             toolbox: Optional dictionary of tools to use. Defaults to TOOL_REGISTRY.
+            llm_client: Optional shared OpenAI client. Defaults to the module-level client.
         """
         super().__init__(
             agent_name=agent_name,
             user_id=user_id,
             deal_id=deal_id,
-            toolbox=toolbox
+            toolbox=toolbox,
+            llm_client=llm_client
         )
 
     def _get_use_case(self) -> str:
@@ -164,15 +166,6 @@ Return ONLY the JSON object with no additional text or explanation."""
                 }
             }
 
-    def _extract_json_block(self, text):
-        """
-        Extracts and parses a JSON object from raw model response.
-        """
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if not match:
-            raise ValueError("No JSON block found in response.")
-        return json.loads(match.group())
-
     def _validate_output_type(self, output):
         """
         Validates that the output matches the chart_elements table structure exactly.
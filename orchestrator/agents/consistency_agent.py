@@ -3,8 +3,7 @@
 
 from orchestrator.base_agent import BaseAgent
 from orchestrator.tools import Tool, TOOL_REGISTRY
-import re
-import json
+import openai
 from typing import Optional, Dict
 
 class ConsistencyAgent(BaseAgent):
@@ -18,7 +17,8 @@ class ConsistencyAgent(BaseAgent):
         agent_name: str = "consistency_agent",
         user_id: Optional[str] = None,
         deal_id: Optional[str] = None,
-        toolbox: Dict[str, Tool] = None
+        toolbox: Dict[str, Tool] = None,
+        llm_client: Optional[openai.OpenAI] = None
     ):
         """
         Initialize the consistency agent.
@@ -28,12 +28,14 @@ class ConsistencyAgent(BaseAgent):
             user_id: Optional user ID for model configuration
             deal_id: Optional deal ID for model configuration
             toolbox: Optional dictionary of tools to use. Defaults to TOOL_REGISTRY.
+            llm_client: Optional shared OpenAI client. Defaults to the module-level client.
         """
         super().__init__(
             agent_name=agent_name,
             user_id=user_id,
             deal_id=deal_id,
-            toolbox=toolbox
+            toolbox=toolbox,
+            llm_client=llm_client
         )
 
     def _get_use_case(self) -> str:
@@ -238,15 +240,6 @@ Return ONLY the JSON object with no additional text or explanation."""
                 
         return True
 
-    def _extract_json_block(self, text):
-        """
-        Extracts and parses a JSON object from raw model response.
-        """
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if not match:
-            raise ValueError("No JSON block found in response.")
-        return json.loads(match.group())
-
     def build_prompt(self, document_text, context={}):
         """
         Builds the prompt for the AI model using the document text and context.
@@ -3,10 +3,13 @@
 
 from orchestrator.base_agent import BaseAgent
 from orchestrator.tools import Tool, TOOL_REGISTRY
+import openai
 import re
-import json
 from typing import Optional, Dict
 
+# Loose numeric run used as the last-resort parse of metric values
+_NUMBER_RE = re.compile(r"[\d\.]+")
+
 class FinancialAgent(BaseAgent):
     """
     Agent to extract key financial metrics from CIM documents.
@@ -18,7 +21,8 @@ class FinancialAgent(BaseAgent):
         agent_name: str = "financial_agent",
         user_id: Optional[str] = None,
         deal_id: Optional[str] = None,
-        toolbox: Dict[str, Tool] = None
+        toolbox: Dict[str, Tool] = None,
+        llm_client: Optional[openai.OpenAI] = None
     ):
         """
         Initialize the financial agent.
@@ -28,12 +32,14 @@ class FinancialAgent(BaseAgent):
             user_id: Optional user ID for model configuration
             deal_id: Optional deal ID for model configuration
             toolbox: Optional dictionary of tools to use. Defaults to TOOL_REGISTRY.
+            llm_client: Optional shared OpenAI client. Defaults to the module-level client.
         """
         super().__init__(
             agent_name=agent_name,
             user_id=user_id,
             deal_id=deal_id,
-            toolbox=toolbox
+            toolbox=toolbox,
+            llm_client=llm_client
         )
 
     def _get_use_case(self) -> str:
@@ -112,15 +118,6 @@ Return ONLY the JSON array with no additional text or explanation."""
             self.logger.error(f"Error parsing financial metrics: {str(e)}")
             return []
 
-    def _extract_json_block(self, text):
-        """
-        Extracts the first brace-to-brace block from LLM output (fallback-safe)
-        """
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if not match:
-            raise ValueError("No JSON block found in response.")
-        return json.loads(match.group())
-
     def build_prompt(self, document_text, context={}):
         """
         Builds the prompt for the AI model using the document text and context.
@@ -198,7 +195,7 @@ Return ONLY the JSON array with no additional text or explanation."""
                 pass
                 
         # Try to extract any number
-        match = re.search(r"[\d\.]+", val)
+        match = _NUMBER_RE.search(val)
         if match:
             try:
                 return float(match.group())
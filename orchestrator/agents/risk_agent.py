@@ -3,8 +3,7 @@
 
 from orchestrator.base_agent import BaseAgent
 from orchestrator.tools import Tool, TOOL_REGISTRY
-import re
-import json
+import openai
 from typing import Optional, Dict
 
 class RiskAgent(BaseAgent):
@@ -18,7 +17,8 @@ class RiskAgent(BaseAgent):
         agent_name: str = "risk_agent",
         user_id: Optional[str] = None,
         deal_id: Optional[str] = None,
-        toolbox: Dict[str, Tool] = None
+        toolbox: Dict[str, Tool] = None,
+        llm_client: Optional[openai.OpenAI] = None
     ):
         """
         Initialize the risk agent.
@@ -28,12 +28,14 @@ class RiskAgent(BaseAgent):
             user_id: Optional user ID for model configuration
             deal_id: Optional deal ID for model configuration
             toolbox: Optional dictionary of tools to use. Defaults to TOOL_REGISTRY.
+            llm_client: Optional shared OpenAI client. Defaults to the module-level client.
         """
         super().__init__(
             agent_name=agent_name,
             user_id=user_id,
             deal_id=deal_id,
-            toolbox=toolbox
+            toolbox=toolbox,
+            llm_client=llm_client
         )
 
     def _get_use_case(self) -> str:
@@ -160,15 +162,6 @@ Return ONLY the JSON object with no additional text or explanation."""
                 }
             }
 
-    def _extract_json_block(self, text):
-        """
-        Extract the first valid JSON object in the response
-        """
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if not match:
-            raise ValueError("No JSON block found in response.")
-        return json.loads(match.group())
-
     def _validate_output_type(self, output):
         """
         Validates that the output matches the ai_outputs table structure exactly.
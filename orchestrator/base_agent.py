@@ -4,9 +4,12 @@
 # Compatible with GPT-4o and future drop-in models
 
 from abc import ABC, abstractmethod
+import asyncio
 from datetime import datetime
+import json
 import openai
 import os
+import re
 import traceback
 import uuid
 import logging
@@ -15,9 +18,40 @@ import tiktoken
 from supabase import create_client, Client
 from .tools import Tool, TOOL_REGISTRY
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib decoder
+    orjson = None
+
 # Initialize OpenAI client (expects OPENAI_API_KEY in env)
 client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Shared decoder for pulling JSON objects out of model responses
+_json_decoder = json.JSONDecoder()
+
+# Whitespace and an optional opening code fence before a response's JSON
+_LEADING_FENCE_RE = re.compile(r"\s*(?:```[\w-]*\s*)?")
+
+
+def _decode_json_at(text: str, start: int, closer: str) -> Any:
+    """
+    Decode the JSON value that opens at text[start].
+    
+    When orjson is installed, the slice up to the last closing bracket is
+    tried with it first; that covers responses holding a single value.
+    Anything else (e.g. brackets in trailing prose) falls back to the
+    stdlib decoder, which stops at the value's own closing bracket.
+    """
+    if orjson is not None:
+        end = text.rfind(closer) + 1
+        if end > start:
+            try:
+                return orjson.loads(text[start:end])
+            except orjson.JSONDecodeError:
+                pass
+    return _json_decoder.raw_decode(text, start)[0]
+
+
 # Initialize Supabase client
 supabase: Client = create_client(
     os.getenv("SUPABASE_URL", ""),
@@ -35,7 +69,8 @@ class BaseAgent(ABC):
         agent_name: str,
         user_id: Optional[str] = None,
         deal_id: Optional[str] = None,
-        toolbox: Dict[str, Tool] = None
+        toolbox: Dict[str, Tool] = None,
+        llm_client: Optional[openai.OpenAI] = None
     ):
         """
         Initialize the agent with user and deal context.
@@ -45,13 +80,15 @@ class BaseAgent(ABC):
             user_id: Optional user ID for model configuration
             deal_id: Optional deal ID for model configuration
             toolbox: Optional dictionary of tools to use. Defaults to TOOL_REGISTRY.
+            llm_client: Optional shared OpenAI client. Defaults to the module-level client.
         """
         self.agent_name = agent_name
         self.user_id = user_id
         self.deal_id = deal_id
         self.logger = logging.getLogger(f"dealmate.{agent_name}")
         self.logs = []
-        self.openai_client = openai.OpenAI()
+        # Reuse one client (and its connection pool) instead of one per agent
+        self.openai_client = llm_client or client
         self.toolbox = toolbox or TOOL_REGISTRY
         self._load_model_config()
 
@@ -256,6 +293,30 @@ class BaseAgent(ABC):
         """
         pass
 
+    def _extract_json_block(self, text: str) -> Any:
+        """
+        Extracts and parses the first JSON object from raw model response.
+        
+        Decoding starts at the first '{' and stops at its matching '}' in a
+        single pass, so prose or code fences after the object are ignored.
+        A response that opens with a JSON array (after whitespace or a code
+        fence) is returned as the whole array; brackets anywhere else, such
+        as citations in prose, are not treated as JSON.
+        
+        Raises:
+            ValueError: If no JSON object is found or it is malformed
+        """
+        body_start = _LEADING_FENCE_RE.match(text).end()
+        if text.startswith("[", body_start):
+            try:
+                return _decode_json_at(text, body_start, "]")
+            except ValueError:
+                pass
+        start = text.find("{")
+        if start == -1:
+            raise ValueError("No JSON block found in response.")
+        return _decode_json_at(text, start, "}")
+
     @abstractmethod
     def _validate_output_type(self, output: Any) -> bool:
         """
@@ -281,8 +342,8 @@ class BaseAgent(ABC):
                 "section_title": chunk["section_title"]
             })
             
-            # Call AI model
-            response = await self._call_ai_model(prompt)
+            # Call AI model; the client is blocking, so keep it off the event loop
+            response = await asyncio.to_thread(self._call_ai_model, prompt)
             
             # Parse and validate response
             result = self.parse_response(response)
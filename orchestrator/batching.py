@@ -0,0 +1,106 @@
+# batching.py
+# Size/interval based batching for high-volume database writes
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBatcher:
+    """
+    Buffers rows and hands them to an async sink in batches.
+
+    A batch is flushed as soon as it reaches flush_size rows, or once
+    flush_interval seconds have passed since the first row was buffered.
+    Callers should await flush() when they are done to write any remainder.
+
+    Flushes run one at a time, so rows reach the sink in the order they were
+    added. If the sink raises, the batch is put back at the front of the
+    buffer and the error is re-raised; the rows are retried on the next flush.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[dict]], Awaitable[Any]],
+        flush_size: int = 200,
+        flush_interval: float = 1.0
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            sink: Coroutine function that writes a list of rows
+            flush_size: Number of buffered rows that triggers a flush
+            flush_interval: Max seconds a row waits before a timed flush
+        """
+        self.sink = sink
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._rows: List[dict] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    async def add(self, row: dict) -> None:
+        """
+        Buffer a row, flushing if the batch is full.
+
+        Args:
+            row: The row to write
+
+        Raises:
+            Exception: If a size-triggered flush fails; see flush()
+        """
+        self._rows.append(row)
+        if len(self._rows) >= self.flush_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def flush(self) -> None:
+        """
+        Write all buffered rows to the sink.
+
+        Raises:
+            Exception: Whatever the sink raised; the rows stay buffered
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._flush_lock:
+            if not self._rows:
+                return
+            rows, self._rows = self._rows, []
+            try:
+                await self.sink(rows)
+            except BaseException:
+                # Keep the failed batch ahead of rows added while it was in flight
+                self._rows = rows + self._rows
+                raise
+
+    def discard(self) -> int:
+        """
+        Drop all buffered rows and cancel any pending timed flush.
+
+        Returns:
+            int: Number of rows dropped
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        dropped = len(self._rows)
+        self._rows = []
+        return dropped
+
+    async def _flush_later(self) -> None:
+        """
+        Flush the buffer once the interval elapses.
+        """
+        await asyncio.sleep(self.flush_interval)
+        # Clear the handle first so flush() does not cancel this task
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("Error flushing batch: %s", e)
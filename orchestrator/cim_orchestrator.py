@@ -1,15 +1,77 @@
 # cim_orchestrator.py
 # Coordinates multi-agent analysis of CIM documents
 
+import asyncio
+import gzip
 import logging
-from typing import List, Optional, Dict, Any
+import uuid
+from collections import deque
+import httpx
+import openai
+from typing import Deque, Iterator, List, Optional, Dict, Any, Tuple
 from orchestrator.agents.financial_agent import FinancialAgent
 from orchestrator.agents.risk_agent import RiskAgent
 from orchestrator.agents.memo_agent import MemoAgent
 from orchestrator.agents.consistency_agent import ConsistencyAgent
 from orchestrator.agents.quote_agent import QuoteAgent
 from orchestrator.agents.chart_agent import ChartAgent
-from orchestrator.tools import TOOL_REGISTRY
+from orchestrator.batching import AsyncBatcher
+from orchestrator.supabase import supabase
+from orchestrator.tools import get_tool_registry
+
+# Chunks per insert batch and max batches buffered between pipeline stages
+CHUNK_BATCH_SIZE = 100
+PIPELINE_QUEUE_SIZE = 4
+
+# ai_outputs rows per insert and max seconds a row waits to be written
+OUTPUT_BATCH_SIZE = 200
+OUTPUT_FLUSH_INTERVAL = 1.0
+
+# Chunks longer than this (in characters) are gzipped into object storage
+CHUNK_OFFLOAD_THRESHOLD = 32 * 1024
+CHUNK_STORAGE_BUCKET = "document-chunks"
+
+# Shared by every chunk without section metadata; never mutate it
+_EMPTY_METADATA: dict = {}
+
+# Connection pool shared by every agent's LLM calls
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+LLM_HTTP_TIMEOUT = 60.0
+
+# One process-wide pool: the server builds an orchestrator per request, so a
+# per-instance client would open (and leak) a new pool every time
+_llm_http_client = httpx.Client(limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT)
+
+
+def _iter_blocks(text: str) -> Iterator[str]:
+    """
+    Yields double-newline separated blocks, matching str.split without the list.
+    """
+    start = 0
+    end_of_text = len(text)
+    while start <= end_of_text:
+        end = text.find("\n\n", start)
+        if end == -1:
+            end = end_of_text
+        yield text[start:end]
+        start = end + 2
+
+
+def load_chunk_text(chunk: dict) -> str:
+    """
+    Returns a chunk's text, fetching it from object storage if offloaded.
+    
+    Args:
+        chunk: A document_chunks row
+        
+    Returns:
+        str: The chunk text
+    """
+    if chunk.get("chunk_text") is not None:
+        return chunk["chunk_text"]
+    data = supabase.storage.from_(CHUNK_STORAGE_BUCKET).download(chunk["chunk_storage_uri"])
+    return gzip.decompress(data).decode("utf-8")
+
 
 class CIMOrchestrator:
     """
@@ -28,48 +90,71 @@ class CIMOrchestrator:
         self.logger = logging.getLogger(__name__)
         self.user_id = user_id
         self.deal_id = deal_id
+        # Cached once so the per-agent / per-chunk loops skip the level check
+        self._log_info_enabled = self.logger.isEnabledFor(logging.INFO)
         
-        # Initialize toolbox once for all agents
-        self.toolbox = TOOL_REGISTRY
+        # Shared process-wide registry, so every orchestrator reuses the same tools
+        self.toolbox = get_tool_registry()
         
-        # Initialize agents with shared toolbox
+        # One LLM client for all agents, on the process-wide connection pool
+        self.llm_client = openai.OpenAI(http_client=_llm_http_client)
+        
+        # Agent outputs are written in batches across chunks
+        self._output_batcher = AsyncBatcher(
+            sink=self._insert_ai_outputs,
+            flush_size=OUTPUT_BATCH_SIZE,
+            flush_interval=OUTPUT_FLUSH_INTERVAL
+        )
+        # Chunks with queued outputs, each paired with the number of outputs that
+        # must be written before it is marked processed
+        self._outputs_queued = 0
+        self._outputs_written = 0
+        self._chunks_awaiting_write: Deque[Tuple[Any, int]] = deque()
+        
+        # Initialize agents with shared toolbox and LLM client
         self.agents = {
             'financial': FinancialAgent(
                 agent_name='financial',
                 user_id=user_id,
                 deal_id=deal_id,
-                toolbox=self.toolbox
+                toolbox=self.toolbox,
+                llm_client=self.llm_client
             ),
             'risk': RiskAgent(
                 agent_name='risk',
                 user_id=user_id,
                 deal_id=deal_id,
-                toolbox=self.toolbox
+                toolbox=self.toolbox,
+                llm_client=self.llm_client
             ),
             'memo': MemoAgent(
                 agent_name='memo',
                 user_id=user_id,
                 deal_id=deal_id,
-                toolbox=self.toolbox
+                toolbox=self.toolbox,
+                llm_client=self.llm_client
             ),
             'consistency': ConsistencyAgent(
                 agent_name='consistency',
                 user_id=user_id,
                 deal_id=deal_id,
-                toolbox=self.toolbox
+                toolbox=self.toolbox,
+                llm_client=self.llm_client
             )
         }
         self.quote_agent = QuoteAgent(
             agent_name="quote_agent",
             user_id=user_id,
             deal_id=deal_id,
-            toolbox=self.toolbox
+            toolbox=self.toolbox,
+            llm_client=self.llm_client
         )
         self.chart_agent = ChartAgent(
             agent_name="chart_agent",
             user_id=user_id,
             deal_id=deal_id,
-            toolbox=self.toolbox
+            toolbox=self.toolbox,
+            llm_client=self.llm_client
         )
 
     def load_pdf_text(self, file_path: str) -> str:
@@ -136,11 +221,12 @@ class CIMOrchestrator:
         results = {}
         for agent_name, agent in self.agents.items():
             try:
-                self.logger.info(f"Running {agent_name} agent")
+                if self._log_info_enabled:
+                    self.logger.info("Running %s agent", agent_name)
                 result = agent.execute(document_text)
                 results[agent_name] = result
             except Exception as e:
-                self.logger.error(f"Error running {agent_name} agent: {str(e)}")
+                self.logger.error("Error running %s agent: %s", agent_name, e)
                 results[agent_name] = {
                     'status': 'error',
                     'error': str(e)
@@ -151,38 +237,88 @@ class CIMOrchestrator:
         """
         Splits document text into chunks with metadata.
         """
+        return list(self._iter_chunks(text, document_id, deal_id))
+
+    def _iter_chunks(self, text: str, document_id: str, deal_id: str) -> Iterator[dict]:
+        """
+        Lazily builds chunk rows from the document sections.
+        """
         # Split text into sections based on headers
-        sections = self._split_into_sections(text)
-        chunks = []
-        
-        for idx, section in enumerate(sections):
-            chunk = {
+        for idx, section in enumerate(self._iter_sections(text)):
+            section_text = section["text"]
+            get = section.get
+            yield {
                 "document_id": document_id,
                 "deal_id": deal_id,
-                "chunk_text": section["text"],
+                "chunk_text": section_text,
                 "chunk_index": idx,
-                "chunk_size": len(section["text"]),
-                "start_page": section.get("start_page"),
-                "end_page": section.get("end_page"),
-                "section_type": section.get("type"),
-                "section_title": section.get("title"),
-                "metadata": section.get("metadata", {}),
-                "processed_by_ai": False
+                "chunk_size": len(section_text),
+                "start_page": get("start_page"),
+                "end_page": get("end_page"),
+                "section_type": get("type"),
+                "section_title": get("title"),
+                "metadata": get("metadata") or _EMPTY_METADATA,
+                "processed_by_ai": False,
+                "chunk_storage_uri": None
             }
-            chunks.append(chunk)
-        
-        return chunks
 
     async def store_chunks(self, chunks: List[dict]) -> List[dict]:
         """
         Stores chunks in the document_chunks table.
+        
+        Chunks larger than CHUNK_OFFLOAD_THRESHOLD are uploaded to object
+        storage and stored with a null chunk_text and a chunk_storage_uri.
+        The returned rows still carry the full text for downstream agents.
         """
-        stored_chunks = []
+        if not chunks:
+            return []
+        
+        large_chunks = [chunk for chunk in chunks if chunk["chunk_size"] > CHUNK_OFFLOAD_THRESHOLD]
+        offloaded = {}
+        if large_chunks:
+            uris = await asyncio.gather(*(self._offload_chunk_text(chunk) for chunk in large_chunks))
+            for chunk, uri in zip(large_chunks, uris):
+                offloaded[chunk["chunk_index"]] = (uri, chunk["chunk_text"])
+        
+        rows = []
         for chunk in chunks:
-            result = await supabase.table("document_chunks").insert(chunk).execute()
-            stored_chunks.append(result.data[0])
+            if chunk["chunk_index"] in offloaded:
+                uri = offloaded[chunk["chunk_index"]][0]
+                chunk = {**chunk, "chunk_text": None, "chunk_storage_uri": uri}
+            rows.append(chunk)
+        
+        # One bulk insert; PostgREST returns the stored rows in input order.
+        # The supabase client is synchronous, so run it off the event loop.
+        result = await asyncio.to_thread(supabase.table("document_chunks").insert(rows).execute)
+        stored_chunks = result.data
+        
+        # Keep offloaded text in memory so agents don't fetch it back
+        if offloaded:
+            for stored_chunk in stored_chunks:
+                if stored_chunk["chunk_index"] in offloaded:
+                    stored_chunk["chunk_text"] = offloaded[stored_chunk["chunk_index"]][1]
         return stored_chunks
 
+    async def _offload_chunk_text(self, chunk: dict) -> str:
+        """
+        Uploads gzipped chunk text to object storage.
+        
+        Args:
+            chunk: The chunk row to offload
+            
+        Returns:
+            str: Storage path of the uploaded text
+        """
+        path = f"{chunk['deal_id']}/{chunk['document_id']}/{chunk['chunk_index']}.txt.gz"
+        data = gzip.compress(chunk["chunk_text"].encode("utf-8"))
+        await asyncio.to_thread(
+            supabase.storage.from_(CHUNK_STORAGE_BUCKET).upload,
+            path,
+            data,
+            {"content-type": "application/gzip", "upsert": "true"}
+        )
+        return path
+
     async def create_chunk_relationships(self, chunks: List[dict]):
         """
         Creates relationships between chunks.
@@ -194,65 +330,102 @@ class CIMOrchestrator:
                 "relationship_type": "sequential",
                 "strength": 1.0
             }
-            await supabase.table("chunk_relationships").insert(relationship).execute()
+            await asyncio.to_thread(supabase.table("chunk_relationships").insert(relationship).execute)
+
+    async def _insert_ai_outputs(self, outputs: List[dict]):
+        """
+        Inserts a batch of agent outputs into the ai_outputs table, then marks
+        the chunks whose outputs have now all been written as processed.
+        """
+        await asyncio.to_thread(supabase.table("ai_outputs").insert(outputs).execute)
+        self._outputs_written += len(outputs)
+        
+        written = self._chunks_awaiting_write
+        chunk_ids = []
+        while written and written[0][1] <= self._outputs_written:
+            chunk_ids.append(written.popleft()[0])
+        if not chunk_ids:
+            return
+        try:
+            await asyncio.to_thread(
+                supabase.table("document_chunks")
+                .update({"processed_by_ai": True})
+                .in_("id", chunk_ids)
+                .execute
+            )
+        except Exception as e:
+            # Don't raise: the outputs are stored and the batcher would insert them again
+            self.logger.error("Error marking chunks %s as processed: %s", chunk_ids, e)
 
     async def process_chunks_with_agents(self, chunks: List[dict]):
         """
         Processes chunks with AI agents.
+        
+        Outputs are queued on the output batcher and all of them are written
+        before this returns; a chunk is marked processed by _insert_ai_outputs
+        once all of its outputs have been written.
+        
+        Raises:
+            Exception: If writing a batch of outputs fails
         """
         for chunk in chunks:
+            outputs = []
             try:
                 # Process with each agent
                 for agent_name, agent in self.agents.items():
                     result = await agent.process_chunk(chunk)
-                    
-                    # Store agent output
-                    output = {
+                    outputs.append({
                         "deal_id": chunk["deal_id"],
                         "document_id": chunk["document_id"],
                         "chunk_id": chunk["id"],
                         "agent_type": agent_name,
                         "output_type": "chunk_analysis",
                         "output_json": result
-                    }
-                    await supabase.table("ai_outputs").insert(output).execute()
-                
-                # Update chunk processing status
-                await supabase.table("document_chunks")\
-                    .update({"processed_by_ai": True})\
-                    .eq("id", chunk["id"])\
-                    .execute()
-                    
+                    })
             except Exception as e:
-                logger.error(f"Error processing chunk {chunk['id']}: {str(e)}")
-                continue
+                self.logger.error("Error processing chunk %s: %s", chunk['id'], e)
+            else:
+                # Registered before queueing so a flush mid-chunk can't mark it early
+                self._chunks_awaiting_write.append((chunk["id"], self._outputs_queued + len(outputs)))
+            # Partial outputs of a failed chunk are still written, just not marked
+            self._outputs_queued += len(outputs)
+            
+            # A failed write is not specific to this chunk, so it propagates
+            for output in outputs:
+                await self._output_batcher.add(output)
+        
+        await self._output_batcher.flush()
 
     def _split_into_sections(self, text: str) -> List[dict]:
         """
         Splits text into logical sections based on headers and content.
         """
+        return list(self._iter_sections(text))
+
+    def _iter_sections(self, text: str) -> Iterator[dict]:
+        """
+        Yields logical sections one at a time as headers are encountered.
+        """
         # TODO: Implement more sophisticated section detection
         # For now, split by double newlines
-        sections = []
-        current_section = {"text": "", "type": None, "title": None}
+        section_type = None
+        section_title = None
+        parts: List[str] = []
         
-        for line in text.split("\n\n"):
+        for line in _iter_blocks(text):
             if line.strip():
                 if line.isupper() and len(line) < 100:  # Likely a header
-                    if current_section["text"]:
-                        sections.append(current_section)
-                    current_section = {
-                        "text": line,
-                        "type": self._detect_section_type(line),
-                        "title": line
-                    }
+                    if parts:
+                        yield {"text": "".join(parts), "type": section_type, "title": section_title}
+                    section_type = self._detect_section_type(line)
+                    section_title = line
+                    parts = [line]
                 else:
-                    current_section["text"] += "\n" + line
+                    # Join once per section instead of re-copying the text per block
+                    parts.append("\n" + line)
         
-        if current_section["text"]:
-            sections.append(current_section)
-        
-        return sections
+        if parts:
+            yield {"text": "".join(parts), "type": section_type, "title": section_title}
 
     def _detect_section_type(self, header: str) -> str:
         """
@@ -274,38 +447,100 @@ class CIMOrchestrator:
         else:
             return "other"
 
+    async def _run_chunk_pipeline(self, text: str, document_id: str, deal_id: str) -> int:
+        """
+        Runs chunking, storage and agent processing as concurrent stages.
+        
+        Stages are connected by bounded queues of chunk batches, so database
+        inserts and agent calls overlap and at most a few batches are held
+        in memory at any time.
+        
+        Args:
+            text: Full document text
+            document_id: The ID of the document being processed
+            deal_id: The ID of the deal the document belongs to
+            
+        Returns:
+            int: Number of chunks handed to the agents
+        """
+        insert_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        agent_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        chunks_processed = 0
+
+        async def chunker():
+            batch = []
+            for chunk in self._iter_chunks(text, document_id, deal_id):
+                batch.append(chunk)
+                if len(batch) >= CHUNK_BATCH_SIZE:
+                    await insert_queue.put(batch)
+                    batch = []
+            if batch:
+                await insert_queue.put(batch)
+            await insert_queue.put(None)
+
+        async def inserter():
+            previous_chunk = None
+            while (batch := await insert_queue.get()) is not None:
+                stored_chunks = await self.store_chunks(batch)
+                # Link across batch boundaries so the sequential chain is unbroken
+                linked = [previous_chunk] + stored_chunks if previous_chunk else stored_chunks
+                await self.create_chunk_relationships(linked)
+                if stored_chunks:
+                    previous_chunk = stored_chunks[-1]
+                await agent_queue.put(stored_chunks)
+            await agent_queue.put(None)
+
+        async def agent_worker():
+            nonlocal chunks_processed
+            while (stored_chunks := await agent_queue.get()) is not None:
+                await self.process_chunks_with_agents(stored_chunks)
+                chunks_processed += len(stored_chunks)
+
+        stages = [asyncio.ensure_future(stage()) for stage in (chunker, inserter, agent_worker)]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            for stage in stages:
+                stage.cancel()
+            raise
+        finally:
+            # Let cancelled stages unwind, then write what finished chunks left
+            # buffered so no rows or timer outlive this run
+            await asyncio.gather(*stages, return_exceptions=True)
+            try:
+                await self._output_batcher.flush()
+            except Exception as e:
+                self.logger.error("Dropped %d unwritten agent outputs: %s", self._output_batcher.discard(), e)
+        return chunks_processed
+
     async def process_document(self, document_id: str, deal_id: str):
         """
         Main method to process a document.
         """
         try:
-            # Extract text from PDF
-            text = await self.load_pdf_text(document_id)
-            
-            # Create and store chunks
-            chunks = await self.create_chunks(text, document_id, deal_id)
-            stored_chunks = await self.store_chunks(chunks)
-            
-            # Create relationships
-            await self.create_chunk_relationships(stored_chunks)
+            # Extract text from PDF; the tool and model calls are blocking,
+            # so they run in threads to keep the pipeline stages overlapping
+            text = await asyncio.to_thread(self.load_pdf_text, document_id)
             
-            # Process chunks
-            await self.process_chunks_with_agents(stored_chunks)
+            # Chunk, store, link and analyse chunks as a streaming pipeline
+            chunks_processed = await self._run_chunk_pipeline(text, document_id, deal_id)
             
             # Process quotes
-            quote_results = await self.quote_agent.process(text)
-            if quote_results and "output_json" in quote_results:
-                await self._save_quote_results(quote_results["output_json"], document_id)
+            quote_results = await asyncio.to_thread(self.quote_agent.execute, text)
+            quote_output = quote_results.get("output")
+            if quote_output and "output_json" in quote_output:
+                await self._save_quote_results(quote_output["output_json"], document_id)
             
             # Process chart
-            chart_results = await self.chart_agent.process(text)
-            if chart_results and "output_json" in chart_results:
-                await self._save_chart_results(chart_results["output_json"], document_id)
+            chart_results = await asyncio.to_thread(self.chart_agent.execute, text)
+            chart_output = chart_results.get("output")
+            if chart_output and "output_json" in chart_output:
+                await self._save_chart_results(chart_output["output_json"], document_id)
             
-            return {"status": "success", "chunks_processed": len(stored_chunks)}
+            return {"status": "success", "chunks_processed": chunks_processed}
             
         except Exception as e:
-            logger.error(f"Error processing document {document_id}: {str(e)}")
+            self.logger.error("Error processing document %s: %s", document_id, e)
             return {"status": "error", "error": str(e)}
 
     async def _save_quote_results(self, results: dict, document_id: str):
@@ -316,37 +551,40 @@ class CIMOrchestrator:
             results: The quote analysis results
             document_id: The ID of the document being processed
         """
-        from models.quote import DocumentQuote, QuoteRelationship
-        from models.document import Document
-        
-        document = await Document.get(document_id)
-        if not document:
+        quotes = [
+            {
+                "id": str(uuid.uuid4()),
+                "deal_id": self.deal_id,
+                "document_id": document_id,
+                "quote_text": quote_data["quote_text"],
+                "speaker": quote_data["speaker"],
+                "speaker_title": quote_data["speaker_title"],
+                "context": quote_data["context"],
+                "significance_score": quote_data["significance_score"],
+                "quote_type": quote_data["quote_type"],
+                "metadata": quote_data["metadata"]
+            }
+            for quote_data in results.get("quotes", [])
+        ]
+        if not quotes:
             return
-            
-        for quote_data in results.get("quotes", []):
-            quote = DocumentQuote(
-                deal_id=self.deal_id,
-                document_id=document_id,
-                quote_text=quote_data["quote_text"],
-                speaker=quote_data["speaker"],
-                speaker_title=quote_data["speaker_title"],
-                context=quote_data["context"],
-                significance_score=quote_data["significance_score"],
-                quote_type=quote_data["quote_type"],
-                metadata=quote_data["metadata"]
-            )
-            await quote.save()
-            
-            # Save quote relationships
-            for rel_data in results.get("quote_relationships", []):
-                if rel_data["quote_id"] == quote.id:
-                    relationship = QuoteRelationship(
-                        quote_id=quote.id,
-                        related_metric=rel_data["related_metric"],
-                        relationship_type=rel_data["relationship_type"],
-                        confidence_score=rel_data["confidence_score"]
-                    )
-                    await relationship.save()
+        await asyncio.to_thread(supabase.table("document_quotes").insert(quotes).execute)
+        
+        # Save relationships that reference one of the stored quotes
+        quote_ids = {quote["id"] for quote in quotes}
+        relationships = [
+            {
+                "id": str(uuid.uuid4()),
+                "quote_id": rel_data["quote_id"],
+                "related_metric": rel_data["related_metric"],
+                "relationship_type": rel_data["relationship_type"],
+                "confidence_score": rel_data["confidence_score"]
+            }
+            for rel_data in results.get("quote_relationships", [])
+            if rel_data["quote_id"] in quote_ids
+        ]
+        if relationships:
+            await asyncio.to_thread(supabase.table("quote_relationships").insert(relationships).execute)
 
     async def _save_chart_results(self, results: dict, document_id: str):
         """Save chart analysis results to the database."""
@@ -357,7 +595,7 @@ class CIMOrchestrator:
                 chart["deal_id"] = self.deal_id
                 
                 # Insert chart element
-                chart_response = self.supabase.table("chart_elements").insert(chart).execute()
+                chart_response = await asyncio.to_thread(supabase.table("chart_elements").insert(chart).execute)
                 if not chart_response.data:
                     raise ValueError(f"Failed to insert chart: {chart}")
                 
@@ -366,7 +604,9 @@ class CIMOrchestrator:
                 # Insert relationships
                 for relationship in chart.get("relationships", []):
                     relationship["chart_id"] = chart_id
-                    rel_response = self.supabase.table("chart_relationships").insert(relationship).execute()
+                    rel_response = await asyncio.to_thread(
+                        supabase.table("chart_relationships").insert(relationship).execute
+                    )
                     if not rel_response.data:
                         raise ValueError(f"Failed to insert chart relationship: {relationship}")
         
@@ -19,7 +19,7 @@ from .whisper_transcribe import WhisperTranscribeTool
 # Available tools:
 # - pdf_to_text: Extracts text content from PDF documents
 # - excel_to_json: Converts Excel files to structured JSON data
-# - whisper_transcribe: Transcribes audio files using OpenAI's Whisper model
+# - whisper_transcribe: Transcribes audio files using Whisper (faster-whisper backend)
 #
 # Each tool is instantiated once at module load time and reused across all
 # agent instances. Tools are stateless and thread-safe.
@@ -29,4 +29,15 @@ TOOL_REGISTRY: Dict[str, Tool] = {
     'whisper_transcribe': WhisperTranscribeTool(),
 }
 
-__all__ = ['TOOL_REGISTRY'] 
\ No newline at end of file
+
+def get_tool_registry() -> Dict[str, Tool]:
+    """
+    Return the process-wide tool registry.
+    
+    Every caller gets the same tool instances, so expensive state such as
+    the loaded Whisper model is shared across orchestrators and agents.
+    """
+    return TOOL_REGISTRY
+
+
+__all__ = ['TOOL_REGISTRY', 'get_tool_registry'] 
\ No newline at end of file
@@ -6,6 +6,7 @@ agent system. Tools are responsible for specific operations like document
 processing, transcription, and data extraction.
 """
 
+import os
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 from enum import Enum
@@ -22,6 +23,26 @@ class ModelUseCase(str, Enum):
     EXCEL_ANALYSIS = "excel_analysis"
 
 
+def prefetch_file(file_path: str) -> None:
+    """
+    Ask the kernel to start reading a whole file into the page cache.
+    
+    The readahead runs asynchronously, so the device can serve many reads
+    at once instead of waiting on each small read the parser issues. This
+    is a no-op on platforms without posix_fadvise.
+    
+    Args:
+        file_path: Path to the file to prefetch
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
 class Tool(ABC):
     """
     Abstract base class for all tools in the DealMate system.
@@ -62,6 +83,8 @@ class Tool(ABC):
         self.description = description
         self.cost_estimate = cost_estimate
         self.required_kwargs = required_kwargs
+        # Frozen once so validate_kwargs is a single C-level subset check
+        self._required_set = frozenset(required_kwargs)
         self.model_use_case = model_use_case
         self.version = version
     
@@ -75,9 +98,10 @@ class Tool(ABC):
         Raises:
             ValueError: If any required kwargs are missing
         """
+        if self._required_set.issubset(kwargs):
+            return
         missing_kwargs = [kw for kw in self.required_kwargs if kw not in kwargs]
-        if missing_kwargs:
-            raise ValueError(f"Missing required arguments: {', '.join(missing_kwargs)}")
+        raise ValueError(f"Missing required arguments: {', '.join(missing_kwargs)}")
     
     @abstractmethod
     def run(self, **kwargs) -> Dict[str, Any]:
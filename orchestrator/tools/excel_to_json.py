@@ -1,29 +1,52 @@
 """
 Excel to JSON conversion tool for DealMate agents.
 
-This tool converts Excel files to JSON format using pandas and openpyxl.
+This tool converts Excel files to JSON format by streaming rows with openpyxl,
+or with the native calamine reader when python-calamine is installed.
 """
 
-import pandas as pd
-from typing import Dict, Any, List
-from .core_tool import Tool, ModelUseCase
+import datetime
+import functools
+import os
+import openpyxl
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from .core_tool import Tool, ModelUseCase, prefetch_file
 import logging
 
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # Fall back to openpyxl
+    CalamineWorkbook = None
+
 logger = logging.getLogger(__name__)
 
+# Upper bound on threads used to convert sheets concurrently
+MAX_SHEET_WORKERS = 8
+# Number of converted workbooks kept in the per-process result cache
+RESULT_CACHE_SIZE = 32
+
 class ExcelToJSONTool(Tool):
     """
     Tool for converting Excel files to JSON format.
     
-    This tool uses pandas with openpyxl engine to read Excel files
-    and convert each sheet to a list of records in JSON format.
+    This tool reads workbooks with python-calamine's native parser when it
+    is installed, otherwise with openpyxl in read-only mode, and turns
+    each sheet's rows into a list of records in JSON format. The first row
+    of each sheet is used as the column headers. Cell values keep the
+    types stored in the workbook (numbers, strings, datetimes), so no
+    per-column type inference or NaN clean-up pass is needed.
+    
+    Results are cached per process by file path, modification time and
+    size, so re-reading an unchanged file skips parsing. Each call gets
+    its own copy of the cached records, so callers may mutate them.
     """
     
     def __init__(self) -> None:
         """Initialize the ExcelToJSONTool with its configuration."""
         super().__init__(
             name="excel_to_json",
-            description="Convert Excel files to JSON format using pandas",
+            description="Convert Excel files to JSON format using openpyxl",
             cost_estimate=0.0,  # CPU-only operation
             required_kwargs=["file_path"],
             model_use_case=ModelUseCase.EXCEL_ANALYSIS,  # Updated to match spec
@@ -36,6 +59,10 @@ class ExcelToJSONTool(Tool):
         
         Args:
             file_path: Path to the Excel file
+            sheet_names: Optional list of sheets to convert. Other sheets
+                are never parsed. Defaults to all sheets.
+            engine_kwargs: Optional extra keyword arguments for
+                openpyxl.load_workbook, overriding the read-only defaults
             
         Returns:
             Dict containing sheets data in JSON format:
@@ -55,25 +82,170 @@ class ExcelToJSONTool(Tool):
         """
         self.validate_kwargs(**kwargs)
         file_path = kwargs["file_path"]
+        sheet_names = kwargs.get("sheet_names")
+        engine_kwargs = kwargs.get("engine_kwargs")
         
         try:
-            # Read all sheets from Excel
-            excel_data = pd.read_excel(file_path, engine='openpyxl', sheet_name=None)
-            
-            # Convert each sheet to JSON records
-            sheets_data = []
-            for sheet_name, df in excel_data.items():
-                # Convert DataFrame to list of records with proper NaN handling
-                records = df.replace({pd.NA: None}).to_dict(orient='records')
-                
-                sheets_data.append({
-                    "name": sheet_name,
-                    "data": records
-                })
+            if engine_kwargs:
+                # Custom load options are not part of the cache key
+                sheets_data = _convert_workbook(file_path, sheet_names, engine_kwargs)
+            else:
+                stat = os.stat(file_path)
+                sheets_data = _copy_sheets(_convert_workbook_cached(
+                    file_path,
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    None if sheet_names is None else tuple(sheet_names)
+                ))
             
             logger.info(f"Successfully processed Excel file: {file_path} with {len(sheets_data)} sheets")
             return {"sheets": sheets_data}
             
         except Exception as e:
             logger.error(f"Failed to process Excel file {file_path}: {str(e)}")
-            raise RuntimeError(f"Failed to process Excel file: {str(e)}") 
\ No newline at end of file
+            raise RuntimeError(f"Failed to process Excel file: {str(e)}") 
+
+
+def _convert_workbook(
+    file_path: str,
+    sheet_names: Optional[Iterable[str]] = None,
+    engine_kwargs: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Convert the requested sheets of a workbook into name/data dicts.
+    
+    The calamine reader is used when installed, unless openpyxl options
+    were passed in engine_kwargs.
+    """
+    # Both readers pull the file in small chunks; warm the cache first
+    prefetch_file(file_path)
+    if CalamineWorkbook is not None and not engine_kwargs:
+        return _convert_with_calamine(file_path, sheet_names)
+    
+    # Stream cells instead of materialising DataFrames
+    options = {"read_only": True, "data_only": True, **(engine_kwargs or {})}
+    workbook = openpyxl.load_workbook(file_path, **options)
+    try:
+        names = workbook.sheetnames if sheet_names is None else list(sheet_names)
+        
+        def convert_sheet(sheet_name: str) -> Dict[str, Any]:
+            rows = workbook[sheet_name].iter_rows(values_only=True)
+            return {"name": sheet_name, "data": _rows_to_records(rows)}
+        
+        if len(names) > 1:
+            # Sheets are independent; map() keeps them in workbook order
+            with ThreadPoolExecutor(max_workers=min(MAX_SHEET_WORKERS, len(names))) as executor:
+                return list(executor.map(convert_sheet, names))
+        return [convert_sheet(name) for name in names]
+    finally:
+        workbook.close()
+
+
+def _convert_with_calamine(
+    file_path: str,
+    sheet_names: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Convert the requested sheets with python-calamine's native XLSX parser.
+    """
+    workbook = CalamineWorkbook.from_path(file_path)
+    names = workbook.sheet_names if sheet_names is None else list(sheet_names)
+    sheets_data = []
+    for sheet_name in names:
+        # Keep leading blank rows/columns so headers line up with openpyxl
+        rows = workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+        records = _rows_to_records(tuple(map(_from_calamine, row)) for row in rows)
+        sheets_data.append({"name": sheet_name, "data": records})
+    return sheets_data
+
+
+def _from_calamine(value: Any) -> Any:
+    """
+    Map a calamine cell value onto what openpyxl returns for the same cell.
+    
+    Calamine reports empty cells as "", every number as float and
+    date-only cells as date; openpyxl gives None, int for whole numbers
+    and datetime.
+    """
+    cls = type(value)
+    if cls is str:
+        return value or None
+    if cls is float:
+        return int(value) if value.is_integer() else value
+    if cls is datetime.date:
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+
+@functools.lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _convert_workbook_cached(
+    file_path: str,
+    mtime_ns: int,
+    size: int,
+    sheet_names: Optional[Tuple[str, ...]]
+) -> List[Dict[str, Any]]:
+    """
+    Cached _convert_workbook keyed by the file's stat so edits invalidate it.
+    """
+    return _convert_workbook(file_path, sheet_names)
+
+
+def _copy_sheets(sheets_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copy cached sheets down to the records; cell values are immutable.
+    """
+    return [
+        {"name": sheet["name"], "data": [record.copy() for record in sheet["data"]]}
+        for sheet in sheets_data
+    ]
+
+
+def _make_headers(header_row: Iterable[Any]) -> List[Any]:
+    """
+    Build column names from a sheet's first row.
+    
+    Blank headers become "Unnamed: <index>" and repeated headers get a
+    ".<n>" suffix, matching the column names pandas produces.
+    """
+    headers = []
+    seen: Dict[Any, int] = {}
+    for idx, header in enumerate(header_row):
+        if header is None:
+            header = f"Unnamed: {idx}"
+        if header in seen:
+            seen[header] += 1
+            header = f"{header}.{seen[header]}"
+        else:
+            seen[header] = 0
+        headers.append(header)
+    return headers
+
+
+def _rows_to_records(rows: Iterable[tuple]) -> List[Dict[str, Any]]:
+    """
+    Convert streamed sheet rows into records keyed by the header row.
+    
+    Empty cells are returned as None. Trailing blank rows are dropped.
+    """
+    rows = iter(rows)
+    header_row = next(rows, None)
+    if header_row is None:
+        return []
+    headers = _make_headers(header_row)
+    width = len(headers)
+    
+    records = []
+    blank_rows = []
+    for row in rows:
+        if len(row) < width:
+            row = row + (None,) * (width - len(row))
+        record = dict(zip(headers, row))
+        if row.count(None) == len(row):
+            # Only keep blank rows that are followed by data
+            blank_rows.append(record)
+            continue
+        if blank_rows:
+            records.extend(blank_rows)
+            blank_rows = []
+        records.append(record)
+    return records
@@ -4,9 +4,125 @@ PDF to text conversion tool for DealMate agents.
 This tool extracts text from PDF files using PyMuPDF (fitz).
 """
 
+import functools
+import multiprocessing
+import os
+import threading
 import fitz
-from typing import Dict, Any
-from .core_tool import Tool, ModelUseCase
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+from .core_tool import Tool, ModelUseCase, prefetch_file
+
+# PDFs with at least this many pages are split across worker processes.
+# MuPDF is not thread-safe, so parallelism has to be process-based.
+PARALLEL_PAGE_THRESHOLD = 64
+MAX_PDF_WORKERS = min(8, os.cpu_count() or 1)
+# Number of extracted documents kept in the per-process result cache
+RESULT_CACHE_SIZE = 32
+# Workers must not be forked from the server process, which may be running
+# CTranslate2 and request threads; fork them from a clean forkserver instead
+# (or spawn them where forkserver is unavailable)
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Starting workers costs far more than extracting a typical document, so one
+# pool is created on first use and shared by every later call
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared worker pool, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_PDF_WORKERS, mp_context=_MP_CONTEXT)
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Drop a broken pool so the next call starts a fresh one.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _extract_page_range(file_path: str, start: int, stop: int, sort: bool = False) -> List[str]:
+    """
+    Extract the text of pages [start, stop) using a private document handle.
+    """
+    doc = fitz.open(file_path)
+    try:
+        return [doc[page_number].get_text("text", sort=sort) for page_number in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _extract_parallel(file_path: str, page_count: int, sort: bool = False) -> List[str]:
+    """
+    Extract text from contiguous page ranges in worker processes.
+    
+    Args:
+        file_path: Path to the PDF file
+        page_count: Number of pages in the document
+        sort: Whether to sort text blocks into reading order
+        
+    Returns:
+        The text of each page, in page order
+    """
+    step = -(-page_count // MAX_PDF_WORKERS)  # ceil division
+    starts = list(range(0, page_count, step))
+    stops = [min(start + step, page_count) for start in starts]
+    pool = _get_pool()
+    try:
+        parts = pool.map(
+            _extract_page_range,
+            [file_path] * len(starts),
+            starts,
+            stops,
+            [sort] * len(starts)
+        )
+        return [page_text for part in parts for page_text in part]
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+
+
+def _extract_pages(file_path: str, sort: bool = False) -> List[str]:
+    """
+    Extract the text of every page of a PDF, in page order.
+    """
+    # Open PDF and extract text from each page. Opening by path lets
+    # MuPDF seek and read objects on demand; stream= would need the
+    # whole file as bytes on the pinned PyMuPDF, so it is not used.
+    # Prefetching first keeps those reads from hitting the disk one by one.
+    prefetch_file(file_path)
+    doc = fitz.open(file_path)
+    try:
+        page_count = doc.page_count
+        if page_count < PARALLEL_PAGE_THRESHOLD or MAX_PDF_WORKERS == 1:
+            return [page.get_text("text", sort=sort) for page in doc]
+    finally:
+        doc.close()
+    return _extract_parallel(file_path, page_count, sort)
+
+
+@functools.lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _extract_pages_cached(file_path: str, mtime_ns: int, size: int, sort: bool) -> Tuple[str, ...]:
+    """
+    Cached _extract_pages keyed by the file's stat so edits invalidate it.
+    
+    Pages are stored as a tuple so the shared cache entry cannot be mutated.
+    """
+    return tuple(_extract_pages(file_path, sort))
 
 
 class PDFToTextTool(Tool):
@@ -14,7 +130,11 @@ class PDFToTextTool(Tool):
     Tool for extracting text from PDF files.
     
     This tool uses PyMuPDF (fitz) to extract text from PDF files,
-    concatenating the text from all pages into a single string.
+    returning the text of each page as well as the concatenated text.
+    Large PDFs are split into page ranges extracted in parallel processes.
+    
+    Results are cached per process by file path, modification time and
+    size, so re-reading an unchanged file skips extraction.
     """
     
     def __init__(self) -> None:
@@ -34,9 +154,16 @@ class PDFToTextTool(Tool):
         
         Args:
             file_path: Path to the PDF file
+            layout_preserve: If True, sort text blocks into reading order
+                (top-left to bottom-right). Slower; defaults to False, which
+                keeps the PDF's internal content order.
             
         Returns:
-            Dict containing the extracted text
+            Dict containing the extracted text:
+            {
+                "pages": ["page 1 text", "page 2 text", ...],
+                "text": "page 1 textpage 2 text..."
+            }
             
         Raises:
             ValueError: If file_path is missing or invalid
@@ -44,18 +171,14 @@ class PDFToTextTool(Tool):
         """
         self.validate_kwargs(**kwargs)
         file_path = kwargs["file_path"]
+        sort = kwargs.get("layout_preserve", False)
         
         try:
-            # Open PDF and extract text from each page
-            doc = fitz.open(file_path)
-            full_text = ""
-            
-            for page in doc:
-                full_text += page.get_text()
-            
-            doc.close()
+            stat = os.stat(file_path)
+            pages = _extract_pages_cached(file_path, stat.st_mtime_ns, stat.st_size, sort)
             
-            return {"text": full_text}
+            # Page boundaries are kept; the full text is joined once per call
+            return {"pages": list(pages), "text": "".join(pages)}
             
         except Exception as e:
-            raise RuntimeError(f"Failed to process PDF: {str(e)}") 
\ No newline at end of file
+            raise RuntimeError(f"Failed to process PDF: {str(e)}")
@@ -1,25 +1,127 @@
 """
 Audio transcription tool for DealMate agents.
 
-This tool transcribes audio files using OpenAI's Whisper model.
+This tool transcribes audio files using OpenAI's Whisper model through
+faster-whisper (CTranslate2). It runs fp16 on a CUDA GPU when one is
+available and int8-quantized weights on CPU otherwise.
 """
 
 import os
-import whisper
-from typing import Dict, Any
+import functools
+import threading
+import ctranslate2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from faster_whisper import WhisperModel, decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from typing import Dict, Any, List, Optional, Tuple
 from .core_tool import Tool, ModelUseCase
 
+# Whisper operates on 16 kHz mono audio
+SAMPLE_RATE = 16000
+# Model size used unless the WHISPER_MODEL environment variable overrides it
+DEFAULT_MODEL_SIZE = "base"
+# Default target length of independently transcribed chunks of long audio
+DEFAULT_CHUNK_SECONDS = 30.0
+# Concurrent chunk transcriptions (CTranslate2 workers) per model
+TRANSCRIBE_WORKERS = 4
+# Loaded models kept per process, keyed by (model size, compute type), so
+# callers alternating between two configurations don't reload each time
+MODEL_CACHE_SIZE = 2
+
+# lru_cache doesn't serialize misses; this keeps concurrent first calls to one load
+_model_lock = threading.Lock()
+
+
+def _select_device() -> Tuple[str, str]:
+    """
+    Choose the device and compute type for the Whisper model.
+    
+    Returns:
+        ("cuda", "float16") when a CUDA device is visible to CTranslate2,
+        otherwise ("cpu", "int8")
+    """
+    if ctranslate2.get_cuda_device_count() > 0:
+        return "cuda", "float16"
+    return "cpu", "int8"
+
+
+def _get_model(model_size: str, compute_type: Optional[str] = None) -> WhisperModel:
+    """
+    Load a Whisper model once per process: fp16 on GPU, int8 on CPU.
+    
+    Up to MODEL_CACHE_SIZE configurations stay loaded at once. Safe to call from several threads at once; only one of them loads.
+    
+    Args:
+        model_size: Whisper model size, e.g. "base"
+        compute_type: CTranslate2 compute type, e.g. "int8". Defaults to
+            the best type for the selected device.
+        
+    Returns:
+        The shared WhisperModel
+    """
+    with _model_lock:
+        return _load_model(model_size, compute_type)
+
+
+@functools.lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _load_model(model_size: str, compute_type: Optional[str]) -> WhisperModel:
+    """
+    Cached model constructor behind _get_model's lock.
+    """
+    device, default_compute_type = _select_device()
+    return WhisperModel(
+        model_size,
+        device=device,
+        compute_type=compute_type or default_compute_type,
+        num_workers=TRANSCRIBE_WORKERS
+    )
+
+
+def _chunk_boundaries(audio: np.ndarray, chunk_samples: int) -> List[int]:
+    """
+    Pick sample offsets that split audio into chunks of at most chunk_samples.
+    
+    Each cut is placed in the middle of the last silence (as found by the
+    VAD) before the chunk limit, so words are not split across chunks. If a
+    chunk contains no silence, it is cut at the limit.
+    
+    Raises:
+        ValueError: If chunk_samples is less than one sample
+    """
+    if chunk_samples < 1:
+        raise ValueError("chunk_samples must be at least 1")
+    speech = get_speech_timestamps(audio, VadOptions())
+    gaps = [(first["end"] + second["start"]) // 2 for first, second in zip(speech, speech[1:])]
+    
+    boundaries = [0]
+    while len(audio) - boundaries[-1] > chunk_samples:
+        limit = boundaries[-1] + chunk_samples
+        candidates = [gap for gap in gaps if boundaries[-1] < gap <= limit]
+        boundaries.append(candidates[-1] if candidates else limit)
+    boundaries.append(len(audio))
+    return boundaries
+
 
 class WhisperTranscribeTool(Tool):
     """
     Tool for transcribing audio files using Whisper.
     
-    This tool uses OpenAI's Whisper model to transcribe audio files
-    and provides cost estimates based on audio duration.
+    This tool uses OpenAI's Whisper model, served by the faster-whisper
+    CTranslate2 backend, to transcribe audio files and provides cost
+    estimates based on audio duration.
+    
+    The model is loaded on first use and shared by all instances in the
+    process, so constructing the tool is cheap. The model size comes from
+    the WHISPER_MODEL environment variable (e.g. "tiny.en"), read when the
+    tool is constructed, and defaults to "base". WHISPER_COMPUTE_TYPE
+    likewise overrides the CTranslate2 compute type (e.g. "int8").
     """
     
     def __init__(self) -> None:
         """Initialize the WhisperTranscribeTool with its configuration."""
+        self.model_size = os.getenv("WHISPER_MODEL", DEFAULT_MODEL_SIZE)
+        self.compute_type = os.getenv("WHISPER_COMPUTE_TYPE")
         super().__init__(
             name="whisper_transcribe",
             description="Transcribe audio files using OpenAI Whisper",
@@ -28,8 +130,11 @@ class WhisperTranscribeTool(Tool):
             model_use_case=ModelUseCase.TRANSCRIPTION,
             version="1.0.0"
         )
-        # Load Whisper model on initialization
-        self.model = whisper.load_model("base")
+    
+    @property
+    def model(self) -> WhisperModel:
+        """The process-wide Whisper model, loaded on first access."""
+        return _get_model(self.model_size, self.compute_type)
     
     def _estimate_cost(self, duration_seconds: float) -> float:
         """
@@ -44,12 +149,60 @@ class WhisperTranscribeTool(Tool):
         # Cost is $0.006 per 15 seconds
         return (duration_seconds / 15.0) * 0.006
     
+    def _transcribe_array(self, audio: np.ndarray, offset: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Transcribe decoded audio and return its segments as dicts.
+        
+        Args:
+            audio: 16 kHz mono samples
+            offset: Seconds to add to segment timestamps
+            
+        Returns:
+            List of segment dicts
+        """
+        segments, _ = self.model.transcribe(audio, beam_size=5, vad_filter=True)
+        results = []
+        for segment in segments:
+            segment = segment._asdict()
+            segment["start"] += offset
+            segment["end"] += offset
+            results.append(segment)
+        return results
+    
+    def _transcribe_chunks(self, audio: np.ndarray, chunk_samples: int) -> List[Dict[str, Any]]:
+        """
+        Split long audio at silences and transcribe the chunks in parallel.
+        
+        Args:
+            audio: 16 kHz mono samples
+            chunk_samples: Maximum chunk length in samples
+            
+        Returns:
+            List of segment dicts with timestamps relative to the full audio
+        """
+        boundaries = _chunk_boundaries(audio, chunk_samples)
+        starts = boundaries[:-1]
+        chunks = [audio[start:end] for start, end in zip(starts, boundaries[1:])]
+        offsets = [start / SAMPLE_RATE for start in starts]
+        
+        with ThreadPoolExecutor(max_workers=TRANSCRIBE_WORKERS) as executor:
+            chunk_segments = executor.map(self._transcribe_array, chunks, offsets)
+            segments = [segment for segments in chunk_segments for segment in segments]
+        
+        # Renumber so ids are unique across chunks
+        for idx, segment in enumerate(segments):
+            segment["id"] = idx
+        return segments
+    
     def run(self, **kwargs) -> Dict[str, Any]:
         """
         Transcribe an audio file.
         
         Args:
             file_path: Path to the audio file
+            chunk_seconds: Audio longer than this is split at silences into
+                chunks of at most this length, transcribed in parallel.
+                Must be positive. Defaults to 30 seconds.
             
         Returns:
             Dict containing transcription data:
@@ -61,26 +214,63 @@ class WhisperTranscribeTool(Tool):
             }
             
         Raises:
-            ValueError: If file_path is missing or invalid
+            ValueError: If file_path is missing or invalid, or chunk_seconds
+                is not positive
             RuntimeError: If transcription fails
         """
         self.validate_kwargs(**kwargs)
         file_path = kwargs["file_path"]
+        chunk_seconds = kwargs.get("chunk_seconds", DEFAULT_CHUNK_SECONDS)
+        if chunk_seconds <= 0:
+            raise ValueError("chunk_seconds must be positive")
+        # Sub-sample lengths still have to advance by one sample per chunk
+        chunk_samples = max(1, int(chunk_seconds * SAMPLE_RATE))
         
         try:
-            # Transcribe audio
-            result = self.model.transcribe(file_path)
+            # Decode once to 16 kHz mono; chunks are views into this array
+            audio = decode_audio(file_path, sampling_rate=SAMPLE_RATE)
+            if audio.size == 0:
+                raise ValueError("Audio file contains no samples")
+            
+            if audio.size > chunk_samples:
+                segments = self._transcribe_chunks(audio, chunk_samples)
+            else:
+                segments = self._transcribe_array(audio)
             
             # Calculate duration and cost
-            duration = result.get("duration", 0)
+            duration = audio.size / SAMPLE_RATE
             cost_estimate = self._estimate_cost(duration)
             
             return {
-                "text": result["text"],
-                "segments": result.get("segments", []),
+                "text": "".join(segment["text"] for segment in segments),
+                "segments": segments,
                 "duration": duration,
                 "cost_estimate": cost_estimate
             }
             
         except Exception as e:
-            raise RuntimeError(f"Failed to transcribe audio: {str(e)}") 
\ No newline at end of file
+            raise RuntimeError(f"Failed to transcribe audio: {str(e)}")
+    
+    def run_batch(self, file_paths: List[str], **kwargs) -> List[Dict[str, Any]]:
+        """
+        Transcribe several audio files concurrently with the shared model.
+        
+        The model serves up to TRANSCRIBE_WORKERS transcriptions at once, so
+        submitting files together keeps its workers busy instead of
+        transcribing them one after another.
+        
+        Args:
+            file_paths: Paths to the audio files
+            **kwargs: Options passed to run() for every file (e.g. chunk_seconds)
+            
+        Returns:
+            One run() result per file, in input order
+            
+        Raises:
+            RuntimeError: If transcription of any file fails
+        """
+        if not file_paths:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(TRANSCRIBE_WORKERS, len(file_paths))) as executor:
+            return list(executor.map(lambda file_path: self.run(file_path=file_path, **kwargs), file_paths)) 
\ No newline at end of file
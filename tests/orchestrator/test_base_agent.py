@@ -52,4 +52,55 @@ def test_run_with_tool():
     # since we don't have a real PDF file. In practice, you'd want to
     # test with actual files and verify the results.
     with pytest.raises(RuntimeError):  # Should fail without a real file
-        agent.run_with_tool("pdf_to_text", file_path="nonexistent.pdf") 
\ No newline at end of file
+        agent.run_with_tool("pdf_to_text", file_path="nonexistent.pdf") 
+
+def test_extract_json_block_ignores_bracketed_citations():
+    """Test that bracketed citations in prose don't shadow the JSON object."""
+    agent = TestAgent("test_agent")
+    assert agent._extract_json_block('Here is the result [1]:\n{"quotes": [{"speaker": "CEO"}]}') == {
+        "quotes": [{"speaker": "CEO"}]
+    }
+    assert agent._extract_json_block('Based on pages [3] and [4], I found:\n{"risks": []}') == {"risks": []}
+
+
+def test_extract_json_block_ignores_trailing_prose():
+    """Test that braces and brackets after the object are not decoded."""
+    agent = TestAgent("test_agent")
+    text = '```json\n{"risks": [{"level": "high"}]}\n```\nNote: see {appendix} and [5].'
+    assert agent._extract_json_block(text) == {"risks": [{"level": "high"}]}
+
+
+def test_extract_json_block_leading_array():
+    """Test that a response opening with an array is returned whole."""
+    agent = TestAgent("test_agent")
+    assert agent._extract_json_block('[{"metric": "EBITDA"}, {"metric": "Revenue"}]') == [
+        {"metric": "EBITDA"}, {"metric": "Revenue"}
+    ]
+    assert agent._extract_json_block('```json\n[{"metric": "EBITDA"}]\n``` [1]') == [{"metric": "EBITDA"}]
+    assert agent._extract_json_block("  []") == []
+
+
+def test_extract_json_block_missing():
+    """Test that a response without JSON raises ValueError."""
+    agent = TestAgent("test_agent")
+    with pytest.raises(ValueError):
+        agent._extract_json_block("No structured output [1].")
+
+
+def test_process_chunk_calls_model_off_event_loop():
+    """Test that the blocking model call runs in a worker thread."""
+    import asyncio
+    import threading
+    
+    call_threads = []
+    
+    class ThreadRecordingAgent(TestAgent):
+        def _call_ai_model(self, prompt, operation="default"):
+            call_threads.append(threading.current_thread())
+            return "ok"
+    
+    agent = ThreadRecordingAgent("test_agent")
+    chunk = {"id": 1, "chunk_text": "text", "section_type": None, "section_title": None}
+    
+    assert asyncio.run(agent.process_chunk(chunk)) == {"result": "ok"}
+    assert call_threads and call_threads[0] is not threading.main_thread()
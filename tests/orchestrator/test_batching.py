@@ -0,0 +1,95 @@
+"""
+Tests for the AsyncBatcher used to batch database writes.
+"""
+
+import asyncio
+import pytest
+from orchestrator.batching import AsyncBatcher
+
+
+def test_flush_on_size():
+    """Test that a full batch is written immediately."""
+    batches = []
+
+    async def sink(rows):
+        batches.append(rows)
+
+    async def run():
+        batcher = AsyncBatcher(sink=sink, flush_size=2, flush_interval=60)
+        for i in range(5):
+            await batcher.add({"i": i})
+        assert [len(b) for b in batches] == [2, 2]
+        await batcher.flush()
+
+    asyncio.run(run())
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [row["i"] for batch in batches for row in batch] == [0, 1, 2, 3, 4]
+
+
+def test_flush_on_interval():
+    """Test that a partial batch is written once the interval elapses."""
+    batches = []
+
+    async def sink(rows):
+        batches.append(rows)
+
+    async def run():
+        batcher = AsyncBatcher(sink=sink, flush_size=100, flush_interval=0.01)
+        await batcher.add({"i": 0})
+        assert batches == []
+        # Wait on the timer task itself rather than racing it with a sleep
+        await batcher._timer
+
+    asyncio.run(run())
+    assert batches == [[{"i": 0}]]
+
+
+def test_flush_empty():
+    """Test that flushing an empty batcher does not call the sink."""
+    batches = []
+
+    async def sink(rows):
+        batches.append(rows)
+
+    asyncio.run(AsyncBatcher(sink=sink).flush())
+    assert batches == []
+
+
+def test_failed_flush_keeps_rows():
+    """Test that a failed sink keeps its rows buffered, in order, for the next flush."""
+    batches = []
+    failures = [RuntimeError("insert failed")]
+
+    async def sink(rows):
+        if failures:
+            raise failures.pop()
+        batches.append(rows)
+
+    async def run():
+        batcher = AsyncBatcher(sink=sink, flush_size=2, flush_interval=60)
+        await batcher.add({"i": 0})
+        with pytest.raises(RuntimeError):
+            await batcher.add({"i": 1})
+        await batcher.add({"i": 2})
+        await batcher.flush()
+
+    asyncio.run(run())
+    assert [row["i"] for batch in batches for row in batch] == [0, 1, 2]
+
+
+def test_discard_drops_rows_and_timer():
+    """Test that discard empties the buffer and cancels the timed flush."""
+    batches = []
+
+    async def sink(rows):
+        batches.append(rows)
+
+    async def run():
+        batcher = AsyncBatcher(sink=sink, flush_size=100, flush_interval=0)
+        await batcher.add({"i": 0})
+        assert batcher.discard() == 1
+        assert batcher._timer is None
+        await batcher.flush()
+
+    asyncio.run(run())
+    assert batches == []
@@ -2,11 +2,13 @@
 Tests for the CIMOrchestrator toolbox integration.
 """
 
+import asyncio
 import pytest
 import os
 import tempfile
-from orchestrator.cim_orchestrator import CIMOrchestrator
-from orchestrator.tools import TOOL_REGISTRY
+from orchestrator import cim_orchestrator
+from orchestrator.cim_orchestrator import CIMOrchestrator, load_chunk_text
+from orchestrator.tools import TOOL_REGISTRY, get_tool_registry
 
 
 @pytest.fixture
@@ -51,6 +53,14 @@ def test_orchestrator_toolbox_initialization():
     assert 'whisper_transcribe' in orchestrator.toolbox
 
 
+def test_orchestrators_share_tool_instances():
+    """Test that every orchestrator reuses the registry's tool instances."""
+    first = CIMOrchestrator()
+    second = CIMOrchestrator()
+    assert get_tool_registry() is TOOL_REGISTRY
+    assert first.toolbox['whisper_transcribe'] is second.toolbox['whisper_transcribe']
+
+
 def test_orchestrator_pdf_processing(sample_pdf):
     """Test PDF processing through toolbox."""
     orchestrator = CIMOrchestrator()
@@ -76,4 +86,318 @@ def test_orchestrator_agent_toolbox_injection():
     """Test that agents receive the toolbox."""
     orchestrator = CIMOrchestrator()
     for agent in orchestrator.agents.values():
-        assert agent.toolbox == TOOL_REGISTRY 
\ No newline at end of file
+        assert agent.toolbox == TOOL_REGISTRY 
+
+class FakeResponse:
+    """Mimics the supabase-py APIResponse."""
+
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Synchronous query builder recording each executed call."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.action = None
+        self.payload = None
+        self.filters = []
+
+    def insert(self, payload):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def update(self, payload):
+        self.action, self.payload = "update", payload
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, list(values)))
+        return self
+
+    def execute(self):
+        if self.table in self.client.failing_tables:
+            raise RuntimeError(f"{self.table} unavailable")
+        self.client.calls.append((self.table, self.action, self.payload, self.filters))
+        if self.action == "insert":
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            stored = []
+            for row in rows:
+                row_id = self.client.next_ids.get(self.table, 0) + 1
+                self.client.next_ids[self.table] = row_id
+                stored.append({**row, "id": row_id})
+            return FakeResponse(stored)
+        return FakeResponse([])
+
+
+class FakeBucket:
+    """Synchronous storage bucket keeping uploaded objects in memory."""
+
+    def __init__(self, objects):
+        self.objects = objects
+
+    def upload(self, path, data, file_options=None):
+        self.objects[path] = data
+
+    def download(self, path):
+        return self.objects[path]
+
+
+class FakeStorage:
+    """Stand-in for the supabase-py storage client."""
+
+    def __init__(self):
+        self.buckets = {}
+
+    def from_(self, bucket):
+        return FakeBucket(self.buckets.setdefault(bucket, {}))
+
+
+class FakeSupabase:
+    """Stand-in for the synchronous supabase-py client."""
+
+    def __init__(self):
+        self.calls = []
+        self.next_ids = {}
+        self.failing_tables = set()
+        self.storage = FakeStorage()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """Replace the orchestrator's supabase client with a synchronous fake."""
+    client = FakeSupabase()
+    monkeypatch.setattr("orchestrator.cim_orchestrator.supabase", client)
+    return client
+
+
+def test_store_chunks_with_sync_client(fake_supabase):
+    """Test that chunks are bulk inserted through the synchronous client."""
+    orchestrator = CIMOrchestrator()
+    chunks = asyncio.run(orchestrator.create_chunks("INTRO\n\nfirst\n\nRISKS\n\nsecond", "doc", "deal"))
+
+    stored = asyncio.run(orchestrator.store_chunks(chunks))
+
+    assert [chunk["id"] for chunk in stored] == [1, 2]
+    assert [chunk["chunk_index"] for chunk in stored] == [0, 1]
+    inserts = [call for call in fake_supabase.calls if call[0] == "document_chunks"]
+    assert len(inserts) == 1
+    assert len(inserts[0][2]) == 2
+
+
+def test_insert_ai_outputs_with_sync_client(fake_supabase):
+    """Test that a batch of agent outputs is written in one insert."""
+    orchestrator = CIMOrchestrator()
+    outputs = [{"chunk_id": 1, "agent_type": "risk"}, {"chunk_id": 1, "agent_type": "memo"}]
+
+    asyncio.run(orchestrator._insert_ai_outputs(outputs))
+
+    assert fake_supabase.calls == [("ai_outputs", "insert", outputs, [])]
+
+
+class FakeAgent:
+    """Agent stub that answers every chunk without calling a model."""
+
+    async def process_chunk(self, chunk):
+        return {"chunk_index": chunk["chunk_index"]}
+
+
+def processed_chunk_ids(client):
+    """Ids of chunks the client was asked to mark as processed."""
+    return [
+        chunk_id
+        for table, action, payload, filters in client.calls
+        if table == "document_chunks" and action == "update"
+        for chunk_id in filters[0][1]
+    ]
+
+
+def test_chunks_marked_processed_after_outputs_written(fake_supabase):
+    """Test that chunks are only marked processed once their outputs are stored."""
+    orchestrator = CIMOrchestrator()
+    orchestrator.agents = {"risk": FakeAgent(), "memo": FakeAgent()}
+    orchestrator._output_batcher.flush_size = 3
+    chunks = [{"id": i, "deal_id": "deal", "document_id": "doc", "chunk_index": i} for i in range(3)]
+    fake_supabase.failing_tables.add("ai_outputs")
+
+    async def run():
+        # Chunk 1's first output fills the batch, whose write fails
+        with pytest.raises(RuntimeError):
+            await orchestrator.process_chunks_with_agents(chunks)
+        assert processed_chunk_ids(fake_supabase) == []
+
+        fake_supabase.failing_tables.clear()
+        await orchestrator._output_batcher.flush()
+
+    asyncio.run(run())
+    outputs = [row for table, action, payload, _ in fake_supabase.calls if table == "ai_outputs" for row in payload]
+    assert [(row["chunk_id"], row["agent_type"]) for row in outputs] == [(0, "risk"), (0, "memo"), (1, "risk")]
+    # Chunk 1 lost its second output to the aborted run, so it stays unprocessed
+    assert processed_chunk_ids(fake_supabase) == [0]
+
+
+def test_store_chunks_offloads_large_text(fake_supabase, monkeypatch):
+    """Test that large chunks go to storage but keep their text for the agents."""
+    monkeypatch.setattr(cim_orchestrator, "CHUNK_OFFLOAD_THRESHOLD", 20)
+    orchestrator = CIMOrchestrator()
+    large_text = "revenue grew " * 10
+    chunks = asyncio.run(orchestrator.create_chunks(f"INTRO\n\nsmall\n\nRISKS\n\n{large_text}", "doc", "deal"))
+
+    stored = asyncio.run(orchestrator.store_chunks(chunks))
+
+    # Only the large chunk is uploaded, and its row is stored without text
+    objects = fake_supabase.storage.buckets[cim_orchestrator.CHUNK_STORAGE_BUCKET]
+    assert list(objects) == ["deal/doc/1.txt.gz"]
+    rows = fake_supabase.calls[0][2]
+    assert rows[0]["chunk_text"] == "INTRO\nsmall"
+    assert rows[0]["chunk_storage_uri"] is None
+    assert rows[1]["chunk_text"] is None
+    assert rows[1]["chunk_storage_uri"] == "deal/doc/1.txt.gz"
+
+    # The returned rows carry the full text either way
+    assert stored[1]["chunk_text"] == chunks[1]["chunk_text"]
+    assert [load_chunk_text(row) for row in rows] == [chunk["chunk_text"] for chunk in chunks]
+
+
+def make_document(n_sections):
+    """Document text with n_sections header/body sections."""
+    return "\n\n".join(f"SECTION {i}\n\nbody {i}" for i in range(n_sections))
+
+
+def test_chunk_pipeline_across_batches(fake_supabase, monkeypatch):
+    """Test that the pipeline stores, links and processes every chunk across batches."""
+    monkeypatch.setattr(cim_orchestrator, "CHUNK_BATCH_SIZE", 3)
+    orchestrator = CIMOrchestrator()
+    orchestrator.agents = {"risk": FakeAgent()}
+
+    processed = asyncio.run(orchestrator._run_chunk_pipeline(make_document(8), "doc", "deal"))
+
+    assert processed == 8
+    chunk_inserts = [payload for table, action, payload, _ in fake_supabase.calls
+                     if table == "document_chunks" and action == "insert"]
+    assert [len(rows) for rows in chunk_inserts] == [3, 3, 2]
+
+    # One unbroken sequential chain, including across batch boundaries
+    links = [(payload["parent_chunk_id"], payload["child_chunk_id"])
+             for table, _, payload, _ in fake_supabase.calls if table == "chunk_relationships"]
+    assert links == [(i, i + 1) for i in range(1, 8)]
+
+    # The final flush writes the outputs still buffered and marks every chunk
+    outputs = [row for table, _, payload, _ in fake_supabase.calls if table == "ai_outputs" for row in payload]
+    assert [row["chunk_id"] for row in outputs] == list(range(1, 9))
+    assert processed_chunk_ids(fake_supabase) == list(range(1, 9))
+
+
+def test_chunk_pipeline_cancels_stages_on_error(fake_supabase, monkeypatch):
+    """Test that a failing stage stops the pipeline without leaving stages running."""
+    monkeypatch.setattr(cim_orchestrator, "CHUNK_BATCH_SIZE", 1)
+    orchestrator = CIMOrchestrator()
+    orchestrator.agents = {"risk": FakeAgent()}
+    fake_supabase.failing_tables.add("document_chunks")
+
+    async def run():
+        # Enough batches that the chunker blocks on the full insert queue
+        with pytest.raises(RuntimeError):
+            await orchestrator._run_chunk_pipeline(make_document(20), "doc", "deal")
+        await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+    assert not any(table == "ai_outputs" for table, *_ in fake_supabase.calls)
+
+
+def test_orchestrators_share_http_pool(monkeypatch):
+    """Test that orchestrators built per request reuse one LLM connection pool."""
+    http_clients = []
+    openai_client = cim_orchestrator.openai.OpenAI
+
+    def recording_openai(*args, **kwargs):
+        http_clients.append(kwargs.get("http_client"))
+        return openai_client(*args, **kwargs)
+
+    monkeypatch.setattr(cim_orchestrator.openai, "OpenAI", recording_openai)
+    CIMOrchestrator()
+    CIMOrchestrator()
+    assert len(http_clients) == 2
+    assert http_clients[0] is not None and http_clients[0] is http_clients[1]
+
+
+class FakeDocumentAgent:
+    """Whole-document agent stub returning a fixed execute() result."""
+
+    def __init__(self, output):
+        self.output = output
+
+    def execute(self, document_text, context=None):
+        return {"status": "success", "output": self.output, "error": None}
+
+
+def test_process_document_end_to_end(fake_supabase, tmp_path):
+    """Test that process_document extracts, chunks, analyses and saves a PDF."""
+    import fitz
+
+    pdf_path = tmp_path / "cim.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 50), "EXECUTIVE SUMMARY")
+    doc.save(str(pdf_path))
+    doc.close()
+
+    orchestrator = CIMOrchestrator(deal_id="deal")
+    orchestrator.agents = {"risk": FakeAgent()}
+    orchestrator.quote_agent = FakeDocumentAgent({"agent_type": "quote_agent", "output_json": {
+        "quotes": [{
+            "quote_text": "We grew fast", "speaker": "CEO", "speaker_title": "Chief Executive",
+            "context": "Intro", "significance_score": 0.9, "quote_type": "executive", "metadata": {}
+        }],
+        "quote_relationships": []
+    }})
+    orchestrator.chart_agent = FakeDocumentAgent({"agent_type": "chart_agent", "output_json": {"charts": [
+        {"title": "Revenue", "relationships": []}
+    ]}})
+
+    result = asyncio.run(orchestrator.process_document(str(pdf_path), "deal"))
+
+    assert result == {"status": "success", "chunks_processed": 1}
+    tables = [table for table, action, *_ in fake_supabase.calls if action == "insert"]
+    assert tables.count("document_chunks") == 1
+    assert tables.count("ai_outputs") == 1
+    assert "document_quotes" in tables
+    assert "chart_elements" in tables
+    assert processed_chunk_ids(fake_supabase) == [1]
+
+
+def test_process_chunks_with_agents_writes_before_returning(fake_supabase):
+    """Test that every queued output is written by the time the call returns."""
+    orchestrator = CIMOrchestrator()
+    orchestrator.agents = {"risk": FakeAgent()}
+    chunks = [{"id": i, "deal_id": "deal", "document_id": "doc", "chunk_index": i} for i in range(1, 3)]
+
+    asyncio.run(orchestrator.process_chunks_with_agents(chunks))
+
+    outputs = [row for table, _, payload, _ in fake_supabase.calls if table == "ai_outputs" for row in payload]
+    assert [row["chunk_id"] for row in outputs] == [1, 2]
+    assert processed_chunk_ids(fake_supabase) == [1, 2]
+    assert orchestrator._output_batcher._rows == []
+
+
+def test_chunk_pipeline_failure_leaves_no_buffered_outputs(fake_supabase):
+    """Test that a failed output write leaves no rows or timer on the orchestrator."""
+    orchestrator = CIMOrchestrator()
+    orchestrator.agents = {"risk": FakeAgent()}
+    fake_supabase.failing_tables.add("ai_outputs")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(orchestrator._run_chunk_pipeline(make_document(3), "doc", "deal"))
+
+    assert orchestrator._output_batcher._rows == []
+    assert orchestrator._output_batcher._timer is None
+    assert processed_chunk_ids(fake_supabase) == []
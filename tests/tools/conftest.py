@@ -0,0 +1,62 @@
+"""
+Shared fixtures for the tool tests.
+"""
+
+import os
+from pathlib import Path
+import pytest
+
+# The tests only check result structure, so use the smallest English model
+# with int8 weights. Set WHISPER_MODEL / WHISPER_COMPUTE_TYPE before running
+# pytest to test with other settings. The tool reads these when constructed,
+# so this only applies to tools built afterwards, such as the whisper_tool
+# fixture; TOOL_REGISTRY's tool may already exist (a full `pytest tests/` run
+# imports it from tests/orchestrator first) and keeps the default model.
+os.environ.setdefault("WHISPER_MODEL", "tiny.en")
+os.environ.setdefault("WHISPER_COMPUTE_TYPE", "int8")
+
+# Importing any tool runs orchestrator/tools/__init__.py, which builds
+# TOOL_REGISTRY and so already imports whisper_transcribe (and its
+# faster_whisper/numpy dependencies) for every test in this directory.
+from orchestrator.tools.pdf_to_text import PDFToTextTool
+from orchestrator.tools.whisper_transcribe import WhisperTranscribeTool
+
+# Golden files checked in next to this conftest; regenerate them with
+# tests/tools/fixtures/make_fixtures.py
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="session")
+def whisper_tool():
+    """Provide one WhisperTranscribeTool for the whole session so the model loads once."""
+    return WhisperTranscribeTool()
+
+
+@pytest.fixture(scope="session")
+def pdf_tool():
+    """Provide one PDFToTextTool for the whole session."""
+    return PDFToTextTool()
+
+
+@pytest.fixture(scope="session")
+def sample_pdf():
+    """Path to the checked-in one-page PDF containing "Lorem ipsum" text."""
+    return str(FIXTURES_DIR / "test.pdf")
+
+
+@pytest.fixture(scope="session")
+def sample_audio_file():
+    """Path to the checked-in 100 ms, 440 Hz sine wave at 16 kHz."""
+    return str(FIXTURES_DIR / "sine_440.wav")
+
+
+@pytest.fixture(scope="session")
+def warm_whisper_tool(whisper_tool, sample_audio_file):
+    """
+    Provide whisper_tool after one throwaway transcription.
+    
+    Model load and first-call setup are paid during fixture setup, so the
+    tests that use this fixture time only their own transcription.
+    """
+    whisper_tool.run(file_path=sample_audio_file)
+    return whisper_tool
@@ -0,0 +1,50 @@
+"""
+Regenerate the golden files used by the tool tests.
+
+Run from the repository root:
+
+    python tests/tools/fixtures/make_fixtures.py
+"""
+
+import wave
+from pathlib import Path
+
+import numpy as np
+from fitz import Document
+
+FIXTURES_DIR = Path(__file__).parent
+
+# Whisper's native rate, so decoding the sample audio needs no resampling
+SAMPLE_RATE = 16000
+
+
+def make_sine_wav(path: Path, duration: float = 0.1, frequency: float = 440.0) -> None:
+    """Write a mono 16-bit PCM sine wave at SAMPLE_RATE."""
+    # Build the phase in place at float32; no float64 time array is allocated
+    audio_data = np.arange(int(SAMPLE_RATE * duration), dtype=np.float32)
+    audio_data *= np.float32(2 * np.pi * frequency / SAMPLE_RATE)
+    np.sin(audio_data, out=audio_data)
+
+    # Convert to 16-bit PCM
+    audio_data *= 32767
+    audio_data = audio_data.astype(np.int16)
+
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)  # Mono
+        wav_file.setsampwidth(2)  # 2 bytes per sample
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(audio_data)  # buffer protocol; no bytes copy
+
+
+def make_pdf(path: Path) -> None:
+    """Write a one-page PDF containing a line of test text."""
+    doc = Document()
+    page = doc.new_page()
+    page.insert_text((50, 50), "Lorem ipsum dolor sit amet")
+    doc.save(str(path), garbage=4, deflate=True)
+    doc.close()
+
+
+if __name__ == "__main__":
+    make_sine_wav(FIXTURES_DIR / "sine_440.wav")
+    make_pdf(FIXTURES_DIR / "test.pdf")
@@ -3,43 +3,38 @@ Unit tests for the ExcelToJSONTool.
 """
 
 import pytest
-import pandas as pd
-import os
-import tempfile
+from openpyxl import Workbook
+from orchestrator.tools import excel_to_json
 from orchestrator.tools.excel_to_json import ExcelToJSONTool
 
 @pytest.fixture
-def sample_excel_file():
+def sample_excel_file(tmp_path):
     """Create a sample Excel file for testing."""
-    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-        # Create sample data
-        df1 = pd.DataFrame({
-            'Metric': ['Revenue', 'EBITDA', 'Net Income'],
-            '2022': [1000000, 200000, 150000],
-            '2023': [1200000, 250000, 180000]
-        })
-        
-        df2 = pd.DataFrame({
-            'Category': ['Product A', 'Product B', 'Product C'],
-            'Sales': [500000, 300000, 400000],
-            'Growth': [0.15, 0.10, 0.20]
-        })
-        
-        # Write to Excel with multiple sheets
-        with pd.ExcelWriter(tmp.name, engine='openpyxl') as writer:
-            df1.to_excel(writer, sheet_name='Financials', index=False)
-            df2.to_excel(writer, sheet_name='Products', index=False)
-            
-        yield tmp.name
-        
-        # Cleanup
-        os.unlink(tmp.name)
+    # Write sample data straight to sheets
+    workbook = Workbook()
+    financials = workbook.active
+    financials.title = 'Financials'
+    financials.append(['Metric', '2022', '2023'])
+    financials.append(['Revenue', 1000000, 1200000])
+    financials.append(['EBITDA', 200000, 250000])
+    financials.append(['Net Income', 150000, 180000])
+    
+    products = workbook.create_sheet('Products')
+    products.append(['Category', 'Sales', 'Growth'])
+    products.append(['Product A', 500000, 0.15])
+    products.append(['Product B', 300000, 0.10])
+    products.append(['Product C', 400000, 0.20])
+    
+    # tmp_path is cleaned up by pytest
+    excel_path = tmp_path / "sample.xlsx"
+    workbook.save(excel_path)
+    return str(excel_path)
 
 def test_initialization():
     """Test tool initialization."""
     tool = ExcelToJSONTool()
     assert tool.name == "excel_to_json"
-    assert tool.description == "Convert Excel files to JSON format using pandas"
+    assert tool.description == "Convert Excel files to JSON format using openpyxl"
     assert tool.cost_estimate == 0.0
     assert tool.model_use_case == "EXCEL_ANALYSIS"
     assert tool.version == "1.0.0"
@@ -74,6 +69,54 @@ def test_conversion(sample_excel_file):
     assert products[0]["Sales"] == 500000
     assert products[0]["Growth"] == 0.15
 
+def test_sheet_selection(sample_excel_file):
+    """Test converting only the requested sheets."""
+    tool = ExcelToJSONTool()
+    result = tool.run(file_path=sample_excel_file, sheet_names=["Products"])
+    
+    assert [sheet["name"] for sheet in result["sheets"]] == ["Products"]
+    assert result["sheets"][0]["data"][0]["Category"] == "Product A"
+
+def test_workbook_opened_once(sample_excel_file, monkeypatch):
+    """Test that all sheets are read from a single opened openpyxl workbook."""
+    import openpyxl
+    monkeypatch.setattr(excel_to_json, "CalamineWorkbook", None)
+    load_workbook = openpyxl.load_workbook
+    calls = []
+    
+    def counting_load_workbook(*args, **kwargs):
+        calls.append(args)
+        return load_workbook(*args, **kwargs)
+    
+    monkeypatch.setattr(openpyxl, "load_workbook", counting_load_workbook)
+    tool = ExcelToJSONTool()
+    result = tool.run(file_path=sample_excel_file)
+    
+    assert len(result["sheets"]) == 2
+    assert len(calls) == 1
+
+def test_cached_result_isolated(sample_excel_file):
+    """Test that mutating one result does not change later results for the file."""
+    tool = ExcelToJSONTool()
+    first = tool.run(file_path=sample_excel_file)
+    first["sheets"][0]["data"][0]["Metric"] = "Changed"
+    first["sheets"][0]["data"].clear()
+    
+    second = tool.run(file_path=sample_excel_file)
+    assert len(second["sheets"][0]["data"]) == 3
+    assert second["sheets"][0]["data"][0]["Metric"] == "Revenue"
+
+def test_calamine_matches_openpyxl(sample_excel_file):
+    """Test that the calamine and openpyxl readers produce the same records."""
+    pytest.importorskip("python_calamine")
+    calamine_sheets = excel_to_json._convert_workbook(sample_excel_file)
+    openpyxl_sheets = excel_to_json._convert_workbook(
+        sample_excel_file, engine_kwargs={"read_only": True}
+    )
+    
+    assert calamine_sheets == openpyxl_sheets
+    assert calamine_sheets[0]["data"][0]["2022"] == 1000000
+
 def test_missing_file_path():
     """Test handling of missing file_path parameter."""
     tool = ExcelToJSONTool()
@@ -86,28 +129,24 @@ def test_invalid_file():
     with pytest.raises(RuntimeError):
         tool.run(file_path="nonexistent_file.xlsx")
 
-def test_nan_handling():
+def test_nan_handling(tmp_path):
     """Test handling of NaN values in Excel data."""
-    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-        # Create DataFrame with NaN values
-        df = pd.DataFrame({
-            'A': [1, None, 3],
-            'B': ['x', 'y', None]
-        })
-        
-        # Write to Excel
-        with pd.ExcelWriter(tmp.name, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Test', index=False)
-        
-        try:
-            # Test conversion
-            tool = ExcelToJSONTool()
-            result = tool.run(file_path=tmp.name)
-            
-            # Check NaN handling
-            data = result["sheets"][0]["data"]
-            assert data[1]["A"] is None  # NaN should be converted to None
-            assert data[2]["B"] is None  # NaN should be converted to None
-            
-        finally:
-            os.unlink(tmp.name) 
\ No newline at end of file
+    # Write rows with empty cells
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = 'Test'
+    sheet.append(['A', 'B'])
+    sheet.append([1, 'x'])
+    sheet.append([None, 'y'])
+    sheet.append([3, None])
+    excel_path = tmp_path / "nan.xlsx"
+    workbook.save(excel_path)
+    
+    # Test conversion
+    tool = ExcelToJSONTool()
+    result = tool.run(file_path=str(excel_path))
+    
+    # Check NaN handling
+    data = result["sheets"][0]["data"]
+    assert data[1]["A"] is None  # NaN should be converted to None
+    assert data[2]["B"] is None  # NaN should be converted to None 
\ No newline at end of file
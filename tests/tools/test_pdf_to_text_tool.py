@@ -2,41 +2,55 @@
 Tests for the PDFToTextTool.
 """
 
-import os
-import pytest
-from fitz import Document
-from orchestrator.tools.pdf_to_text import PDFToTextTool
 
+def test_pdf_to_text_tool(sample_pdf, pdf_tool):
+    """Test that PDFToTextTool correctly extracts text from a PDF."""
+    # Run the shared tool
+    result = pdf_tool.run(file_path=sample_pdf)
+    
+    # Verify the result
+    assert "text" in result
+    assert "Lorem ipsum" in result["text"]
+    assert len(result["pages"]) == 1
+    assert "Lorem ipsum" in result["pages"][0]
 
-@pytest.fixture
-def sample_pdf(tmp_path):
-    """Create a sample PDF file with test content."""
-    # Create a new PDF document
-    doc = Document()
-    page = doc.new_page()
-    
-    # Add some text to the page
-    page.insert_text((50, 50), "Lorem ipsum dolor sit amet")
-    
-    # Save the PDF
-    pdf_path = tmp_path / "test.pdf"
-    doc.save(str(pdf_path))
-    doc.close()
+
+def test_repeated_runs_reuse_cached_text(sample_pdf, pdf_tool, monkeypatch):
+    """Test that re-reading an unchanged PDF does not open the file again."""
+    import fitz
+    first = pdf_tool.run(file_path=sample_pdf)
+    
+    opens = []
+    open_document = fitz.open
     
-    return str(pdf_path)
+    def counting_open(*args, **kwargs):
+        opens.append(args)
+        return open_document(*args, **kwargs)
+    
+    monkeypatch.setattr(fitz, "open", counting_open)
+    second = pdf_tool.run(file_path=sample_pdf)
+    
+    assert second == first
+    assert opens == []
 
 
-def test_pdf_to_text_tool(sample_pdf):
-    """Test that PDFToTextTool correctly extracts text from a PDF."""
-    # Initialize the tool
-    tool = PDFToTextTool()
+def test_parallel_extraction_matches_sequential(tmp_path, monkeypatch):
+    """Test that splitting pages across the worker pool keeps text and order."""
+    import fitz
+    from orchestrator.tools import pdf_to_text
     
-    # Run the tool
-    result = tool.run(file_path=sample_pdf)
+    pdf_path = str(tmp_path / "pages.pdf")
+    doc = fitz.open()
+    for page_number in range(7):
+        doc.new_page().insert_text((50, 50), f"Page {page_number} revenue")
+    doc.save(pdf_path)
+    doc.close()
     
-    # Verify the result
-    assert "text" in result
-    assert "Lorem ipsum" in result["text"]
+    monkeypatch.setattr(pdf_to_text, "PARALLEL_PAGE_THRESHOLD", 2)
+    monkeypatch.setattr(pdf_to_text, "MAX_PDF_WORKERS", 3)
+    sequential = pdf_to_text._extract_page_range(pdf_path, 0, 7)
     
-    # Clean up
-    os.remove(sample_pdf) 
\ No newline at end of file
+    assert pdf_to_text._extract_pages(pdf_path) == sequential
+    pool = pdf_to_text._get_pool()
+    assert pdf_to_text._extract_pages(pdf_path) == sequential
+    assert pdf_to_text._get_pool() is pool  # The pool is reused across calls
@@ -3,51 +3,41 @@ Unit tests for the WhisperTranscribeTool.
 """
 
 import pytest
-import os
-import tempfile
-import wave
+import struct
+import threading
+import time
+from collections import namedtuple
 import numpy as np
-from orchestrator.tools.whisper_transcribe import WhisperTranscribeTool
+from orchestrator.tools import whisper_transcribe
 
-@pytest.fixture
-def sample_audio_file():
-    """Create a sample audio file for testing."""
-    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-        # Create a simple sine wave audio file
-        sample_rate = 44100
-        duration = 1.0  # 1 second
-        t = np.linspace(0, duration, int(sample_rate * duration))
-        audio_data = np.sin(2 * np.pi * 440 * t)  # 440 Hz sine wave
-        
-        # Convert to 16-bit PCM
-        audio_data = (audio_data * 32767).astype(np.int16)
-        
-        # Write to WAV file
-        with wave.open(tmp.name, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 2 bytes per sample
-            wav_file.setframerate(sample_rate)
-            wav_file.writeframes(audio_data.tobytes())
-            
-        yield tmp.name
-        
-        # Cleanup
-        os.unlink(tmp.name)
+Segment = namedtuple("Segment", ["id", "start", "end", "text"])
 
-def test_initialization():
+def write_silent_wav(path, n_samples, sample_rate=16000):
+    """Write a mono 16-bit PCM WAV of n_samples zero samples."""
+    data_size = 2 * n_samples
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, 2 * sample_rate, 2, 16,
+        b"data", data_size
+    )
+    with open(path, "wb") as wav_file:
+        wav_file.write(header + bytes(data_size))
+
+@pytest.mark.slow
+def test_initialization(whisper_tool):
     """Test tool initialization."""
-    tool = WhisperTranscribeTool()
-    assert tool.name == "whisper_transcribe"
-    assert tool.description == "Transcribe audio files using OpenAI Whisper"
-    assert tool.cost_estimate == 0.006
-    assert tool.model_use_case == "TRANSCRIPTION"
-    assert tool.version == "1.0.0"
-    assert tool.model is not None  # Model should be loaded
+    assert whisper_tool.name == "whisper_transcribe"
+    assert whisper_tool.description == "Transcribe audio files using OpenAI Whisper"
+    assert whisper_tool.cost_estimate == 0.006
+    assert whisper_tool.model_use_case == "TRANSCRIPTION"
+    assert whisper_tool.version == "1.0.0"
+    assert whisper_tool.model is not None  # Model should be loaded
 
-def test_transcription(sample_audio_file):
+@pytest.mark.slow
+def test_transcription(sample_audio_file, warm_whisper_tool):
     """Test audio transcription."""
-    tool = WhisperTranscribeTool()
-    result = tool.run(file_path=sample_audio_file)
+    result = warm_whisper_tool.run(file_path=sample_audio_file)
     
     # Check structure
     assert isinstance(result, dict)
@@ -62,35 +52,155 @@ def test_transcription(sample_audio_file):
     assert isinstance(result["duration"], (int, float))
     assert isinstance(result["cost_estimate"], float)
     
-    # Check cost estimation
+    # Check duration and cost estimation
+    assert result["duration"] > 0
+    assert result["cost_estimate"] > 0
     expected_cost = (result["duration"] / 15.0) * 0.006
     assert abs(result["cost_estimate"] - expected_cost) < 0.0001
 
-def test_missing_file_path():
+@pytest.mark.slow
+def test_run_batch(sample_audio_file, warm_whisper_tool, tmp_path):
+    """Test transcribing several files in one batch call."""
+    silent_path = tmp_path / "silent.wav"
+    write_silent_wav(silent_path, 3200)  # 200ms of silence
+    
+    results = warm_whisper_tool.run_batch([sample_audio_file, str(silent_path)])
+    
+    # One result per file, in input order
+    assert len(results) == 2
+    assert abs(results[0]["duration"] - 0.1) < 0.01
+    assert abs(results[1]["duration"] - 0.2) < 0.01
+    for result in results:
+        assert isinstance(result["text"], str)
+        assert isinstance(result["segments"], list)
+        expected_cost = (result["duration"] / 15.0) * 0.006
+        assert abs(result["cost_estimate"] - expected_cost) < 0.0001
+
+def test_missing_file_path(whisper_tool):
     """Test handling of missing file_path parameter."""
-    tool = WhisperTranscribeTool()
     with pytest.raises(ValueError):
-        tool.run()  # No file_path provided
+        whisper_tool.run()  # No file_path provided
 
-def test_invalid_file():
+def test_invalid_file(whisper_tool):
     """Test handling of invalid file."""
-    tool = WhisperTranscribeTool()
+    with pytest.raises(RuntimeError):
+        whisper_tool.run(file_path="nonexistent_file.wav")
+
+def test_errors_raised_before_model_load(monkeypatch):
+    """Test that argument and file errors never load the Whisper model."""
+    loads = []
+    
+    def record_load(*args, **kwargs):
+        loads.append(args)
+        raise AssertionError("model should not be loaded")
+    
+    monkeypatch.setattr(whisper_transcribe, "_get_model", record_load)
+    tool = whisper_transcribe.WhisperTranscribeTool()
+    with pytest.raises(ValueError):
+        tool.run()
     with pytest.raises(RuntimeError):
         tool.run(file_path="nonexistent_file.wav")
+    assert loads == []
+
+def test_concurrent_first_use_loads_model_once(monkeypatch):
+    """Test that threads racing for the model on first use share one load."""
+    loads = []
+    
+    def slow_model(*args, **kwargs):
+        loads.append(args)
+        time.sleep(0.05)  # Widen the window for a racing load
+        return object()
+    
+    monkeypatch.setattr(whisper_transcribe, "WhisperModel", slow_model)
+    monkeypatch.setattr(whisper_transcribe, "_select_device", lambda: ("cpu", "int8"))
+    try:
+        models = []
+        threads = [
+            threading.Thread(target=lambda: models.append(whisper_transcribe._get_model("stub-model")))
+            for _ in range(whisper_transcribe.TRANSCRIBE_WORKERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        # Don't let the stub model evict a real one for later tests
+        whisper_transcribe._load_model.cache_clear()
+    
+    assert len(loads) == 1
+    assert all(model is models[0] for model in models)
+
+@pytest.mark.parametrize("chunk_seconds", [0, -1])
+def test_invalid_chunk_seconds(monkeypatch, sample_audio_file, chunk_seconds):
+    """Test that a non-positive chunk length is rejected before decoding."""
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("audio should not be decoded")
+    
+    monkeypatch.setattr(whisper_transcribe, "decode_audio", fail_decode)
+    tool = whisper_transcribe.WhisperTranscribeTool()
+    with pytest.raises(ValueError):
+        tool.run(file_path=sample_audio_file, chunk_seconds=chunk_seconds)
+
+def test_chunk_boundaries_cut_at_silences(monkeypatch):
+    """Test that cuts fall in the last silence before each chunk limit."""
+    speech = [{"start": 0, "end": 40}, {"start": 60, "end": 90}, {"start": 110, "end": 250}]
+    monkeypatch.setattr(whisper_transcribe, "get_speech_timestamps", lambda audio, options: speech)
+    audio = np.zeros(250, dtype=np.float32)
+    
+    # Gaps are at 50 and 100; the speech after 100 has no silence, so it is cut at the limit
+    assert whisper_transcribe._chunk_boundaries(audio, 120) == [0, 100, 220, 250]
+    assert whisper_transcribe._chunk_boundaries(audio, 250) == [0, 250]
+    assert whisper_transcribe._chunk_boundaries(audio, 1) == list(range(251))
+    with pytest.raises(ValueError):
+        whisper_transcribe._chunk_boundaries(audio, 0)
 
-def test_empty_audio_file():
+def test_transcribe_chunks_offsets(monkeypatch):
+    """Test that chunk segments get full-audio timestamps and unique ids."""
+    sample_rate = whisper_transcribe.SAMPLE_RATE
+    
+    class FakeModel:
+        def transcribe(self, audio, **kwargs):
+            seconds = len(audio) / sample_rate
+            return iter([Segment(0, 0.0, seconds / 2, "a"), Segment(1, seconds / 2, seconds, "b")]), None
+    
+    monkeypatch.setattr(whisper_transcribe, "get_speech_timestamps", lambda audio, options: [])
+    monkeypatch.setattr(whisper_transcribe, "_get_model", lambda *args: FakeModel())
+    tool = whisper_transcribe.WhisperTranscribeTool()
+    audio = np.zeros(5 * sample_rate, dtype=np.float32)
+    
+    segments = tool._transcribe_chunks(audio, 2 * sample_rate)
+    
+    # Chunks of 2 s, 2 s and 1 s, each split into two segments
+    assert [segment["id"] for segment in segments] == list(range(6))
+    assert [(segment["start"], segment["end"]) for segment in segments] == [
+        (0.0, 1.0), (1.0, 2.0), (2.0, 3.0), (3.0, 4.0), (4.0, 4.5), (4.5, 5.0)
+    ]
+    assert "".join(segment["text"] for segment in segments) == "ababab"
+
+def test_alternating_configurations_stay_loaded(monkeypatch):
+    """Test that switching between two model configurations does not reload either."""
+    loads = []
+    
+    def record_model(model_size, **kwargs):
+        loads.append((model_size, kwargs["compute_type"]))
+        return object()
+    
+    monkeypatch.setattr(whisper_transcribe, "WhisperModel", record_model)
+    monkeypatch.setattr(whisper_transcribe, "_select_device", lambda: ("cpu", "int8"))
+    try:
+        for _ in range(3):
+            whisper_transcribe._get_model("stub-model")
+            whisper_transcribe._get_model("stub-model", "float32")
+    finally:
+        whisper_transcribe._load_model.cache_clear()
+    
+    assert loads == [("stub-model", "int8"), ("stub-model", "float32")]
+
+def test_empty_audio_file(whisper_tool, tmp_path):
     """Test handling of empty audio file."""
-    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-        # Create an empty WAV file
-        with wave.open(tmp.name, 'wb') as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(44100)
-            wav_file.writeframes(b'')
-        
-        try:
-            tool = WhisperTranscribeTool()
-            with pytest.raises(RuntimeError):
-                tool.run(file_path=tmp.name)
-        finally:
-            os.unlink(tmp.name) 
\ No newline at end of file
+    # Create an empty WAV file
+    empty_path = tmp_path / "empty.wav"
+    write_silent_wav(empty_path, 0)
+    
+    with pytest.raises(RuntimeError):
+        whisper_tool.run(file_path=str(empty_path)) 
\ No newline at end of file